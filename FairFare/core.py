@@ -1,51 +1,221 @@
+import gc
+import itertools
+import os
 import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from numbers import Number
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
 
 from FairFare.utils.mappings import SPLIT_METHODS_MAPPING
+from FairFare.utils.metrics import timed
+from FairFare.utils.money import MINOR_UNITS, Money, to_major, to_minor
+
+_id_prefix = ""
+_id_counter = itertools.count()
+
+
+def _reseed_ids():
+    global _id_prefix, _id_counter
+    _id_prefix = uuid.uuid4().hex[:16]
+    _id_counter = itertools.count()
+
+
+_reseed_ids()
+# a forked worker must not hand out the same ids as its parent
+os.register_at_fork(after_in_child=_reseed_ids)
+
+
+def new_id() -> str:
+    """
+    Unique 32-hex-digit id: a random per-process prefix followed by a counter,
+    which is much cheaper than drawing a fresh uuid4 for every object.
+    """
+    return f"{_id_prefix}{next(_id_counter):016x}"
+
 
+def new_ids(n: int) -> List[str]:
+    prefix = _id_prefix
+    return [f"{prefix}{i:016x}" for i in itertools.islice(_id_counter, n)]
 
-@dataclass
+
+@contextmanager
+def _gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _all_numeric(values: List) -> bool:
+    # checking each distinct type once is much cheaper than isinstance on every value
+    return all(issubclass(value_type, Number) for value_type in set(map(type, values)))
+
+
+@dataclass(slots=True)
 class Person:
     name: str
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=new_id)
     net_balance: float = 0.0  # Positive: should receive; Negative: should pay
 
 
-@dataclass
+@dataclass(slots=True)
 class Payment:
     participant_contributions: Dict[str, float]
     input_participant_shares: Dict[str, float]
     split_method: str = "even"
     description: str = ""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    total: float = field(init=False)
-    split_participant_shares: Dict[str, float] = field(init=False)
+    id: str = field(default_factory=new_id)
+    minor_units: int = MINOR_UNITS
+    # currency code of the amounts; None means the settlement currency of the ledger
+    currency: Optional[str] = None
+    # exact amounts in integer minor units, used for balancing
+    total_minor: Money = field(init=False)
+    contributions_minor: Dict[str, Money] = field(init=False)
+    split_shares_minor: Dict[str, Money] = field(init=False)
 
+    # not timed per object, where the hook would add a quarter to the cost; batches are timed in from_columns
     def __post_init__(self):
-        # compute total after initialization
-        self.validate()
-        self.total = sum(self.participant_contributions.values())
-        self.split_participant_shares = SPLIT_METHODS_MAPPING[self.split_method](
-            self.total, self.input_participant_shares
+        # validate, convert and total the contributions in one pass
+        self.contributions_minor = self.validate()
+        self.total_minor = sum(self.contributions_minor.values())
+        self.split_shares_minor = SPLIT_METHODS_MAPPING[self.split_method](
+            self.total_minor, self.input_participant_shares, self.minor_units
         )
 
-    def validate(self):
-        if not all(paid >= 0 for paid in self.participant_contributions.values()):
-            raise ValueError("Paid values should be non-negative.")
-
-        if not all(share >= 0 for share in self.input_participant_shares.values()):
-            raise ValueError("Share values should be non-negative.")
+    @property
+    def total(self) -> float:
+        return to_major(self.total_minor, self.minor_units)
 
-        if not all(isinstance(paid, Number) for paid in self.participant_contributions.values()):
-            raise ValueError("Paid values should be numeric.")
-
-        if not all(isinstance(share, Number) for share in self.input_participant_shares.values()):
-            raise ValueError("Shares should be numeric.")
+    @property
+    def split_participant_shares(self) -> Dict[str, float]:
+        return {pid: to_major(share, self.minor_units) for pid, share in self.split_shares_minor.items()}
 
+    def validate(self) -> Dict[str, Money]:
+        """
+        Check every value in a single pass.
+        :return: Contributions converted to minor units.
+        """
         if self.split_method not in SPLIT_METHODS_MAPPING:
             raise ValueError(
                 f"Unknown split method '{self.split_method}'. "
                 f"Available methods: {list(SPLIT_METHODS_MAPPING.keys())}"
             )
+
+        contributions_minor = {}
+        for pid, paid in self.participant_contributions.items():
+            if not isinstance(paid, Number):
+                raise ValueError("Paid values should be numeric.")
+            if paid < 0:
+                raise ValueError("Paid values should be non-negative.")
+            contributions_minor[pid] = to_minor(paid, self.minor_units)
+
+        for share in self.input_participant_shares.values():
+            if not isinstance(share, Number):
+                raise ValueError("Shares should be numeric.")
+            if share < 0:
+                raise ValueError("Share values should be non-negative.")
+
+        return contributions_minor
+
+    @classmethod
+    @timed("payment.from_columns")
+    def from_columns(
+        cls,
+        participant_contributions: Sequence[Dict[str, float]],
+        input_participant_shares: Sequence[Dict[str, float]],
+        split_method: Union[str, Sequence[str]] = "even",
+        description: Union[str, Sequence[str]] = "",
+        id: Optional[Sequence[str]] = None,
+        minor_units: int = MINOR_UNITS,
+        currency: Optional[str] = None,
+    ) -> List["Payment"]:
+        """
+        Build a batch of payments from column-wise inputs.
+        Amounts of the whole batch are validated and converted to minor units as flat arrays,
+        and even splits (the common case) are computed vectorized; other split methods use
+        the regular split functions. The batch is all-or-nothing.
+        :param participant_contributions: Contributions of each payment.
+        :param input_participant_shares: Input shares of each payment.
+        :param split_method: One split method for all payments, or one per payment.
+        :param description: One description for all payments, or one per payment.
+        :param id: Optional payment ids; fresh ids are generated when omitted.
+        :param currency: Currency of every payment in the batch.
+        :return: The payments, in input order.
+        """
+        n = len(participant_contributions)
+        split_methods = [split_method] * n if isinstance(split_method, str) else list(split_method)
+        descriptions = [description] * n if isinstance(description, str) else list(description)
+        ids = new_ids(n) if id is None else list(id)
+        if not len(input_participant_shares) == len(split_methods) == len(descriptions) == len(ids) == n:
+            raise ValueError("All payment columns must have the same length.")
+
+        unknown = set(split_methods) - SPLIT_METHODS_MAPPING.keys()
+        if unknown:
+            raise ValueError(
+                f"Unknown split method '{unknown.pop()}'. " f"Available methods: {list(SPLIT_METHODS_MAPPING.keys())}"
+            )
+
+        paid = [amount for contributions in participant_contributions for amount in contributions.values()]
+        shares = [share for payment_shares in input_participant_shares for share in payment_shares.values()]
+        if not _all_numeric(paid):
+            raise ValueError("Paid values should be numeric.")
+        if not _all_numeric(shares):
+            raise ValueError("Shares should be numeric.")
+        paid_array = np.asarray(paid, dtype=np.float64)
+        if (paid_array < 0).any():
+            raise ValueError("Paid values should be non-negative.")
+        if (np.asarray(shares, dtype=np.float64) < 0).any():
+            raise ValueError("Share values should be non-negative.")
+
+        paid_minor = np.rint(paid_array * 10**minor_units).astype(np.int64)
+        paid_counts = np.fromiter(map(len, participant_contributions), dtype=np.int64, count=n)
+        totals = np.zeros(n, dtype=np.int64)
+        np.add.at(totals, np.repeat(np.arange(n), paid_counts), paid_minor)
+
+        # even split: per-head floor plus one leftover unit for the first participants
+        share_counts = np.fromiter(map(len, input_participant_shares), dtype=np.int64, count=n)
+        # computed for the even payments only
+        is_even = [method == "even" for method in split_methods]
+        even_mask = np.array(is_even, dtype=bool)
+        even_counts = share_counts[even_mask]
+        if (even_counts == 0).any():
+            raise ZeroDivisionError("Even split needs at least one participant.")
+        per_head, leftover = np.divmod(totals[even_mask], np.maximum(even_counts, 1))
+        positions = np.arange(even_counts.sum()) - np.repeat(np.cumsum(even_counts) - even_counts, even_counts)
+        even_shares = (np.repeat(per_head, even_counts) + (positions < np.repeat(leftover, even_counts))).tolist()
+
+        # consume the flat columns payment by payment; zip stops at the end of each payment's keys
+        paid_minor = iter(paid_minor.tolist())
+        even_shares = iter(even_shares)
+        payments = []
+        # the batch allocates only acyclic containers, so skip the cyclic GC passes it would trigger
+        with _gc_paused():
+            for i, total_minor in enumerate(totals.tolist()):
+                payment_shares = input_participant_shares[i]
+                payment = object.__new__(cls)
+                payment.participant_contributions = participant_contributions[i]
+                payment.input_participant_shares = payment_shares
+                payment.split_method = split_methods[i]
+                payment.description = descriptions[i]
+                payment.id = ids[i]
+                payment.minor_units = minor_units
+                payment.currency = currency
+                payment.contributions_minor = dict(zip(participant_contributions[i], paid_minor))
+                payment.total_minor = total_minor
+                if is_even[i]:
+                    payment.split_shares_minor = dict(zip(payment_shares, even_shares))
+                else:
+                    try:
+                        payment.split_shares_minor = SPLIT_METHODS_MAPPING[split_methods[i]](
+                            total_minor, payment_shares, minor_units
+                        )
+                    except ValueError as e:
+                        raise ValueError(f"Payment {i}: {e}") from e
+                payments.append(payment)
+        return payments
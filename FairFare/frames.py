@@ -0,0 +1,257 @@
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from FairFare.core import Payment
+from FairFare.utils.mappings import SPLIT_METHODS_MAPPING
+from FairFare.utils.metrics import timed
+from FairFare.utils.money import MINOR_UNITS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# columns of the long-format payments table, one row per payer ("paid") or sharee ("share") of a payment
+LEDGER_COLUMNS = ["payment_id", "participant_id", "role", "amount", "split_method", "description", "currency"]
+
+
+def _pandas():
+    # imported on first use, so the CLI and the web app start without loading pandas
+    try:
+        import pandas as pd
+    except ImportError as e:
+        raise ImportError("DataFrame support needs pandas: pip install pandas") from e
+    return pd
+
+
+class _Entries:
+    """
+    The rows of a long-format payments table as flat arrays, with every payment mapped to a dense code
+    in order of first appearance.
+    """
+
+    def __init__(self, frame: "pd.DataFrame", minor_units: int):
+        pd = _pandas()
+        missing = {"payment_id", "participant_id", "role", "amount"} - set(frame.columns)
+        if missing:
+            raise ValueError(f"Missing payment columns {sorted(missing)}.")
+        role = frame["role"].to_numpy()
+        self.is_paid = role == "paid"
+        if not (self.is_paid | (role == "share")).all():
+            raise ValueError("Roles should be 'paid' or 'share'.")
+        if not pd.api.types.is_numeric_dtype(frame["amount"]):
+            raise ValueError("Amounts should be numeric.")
+        self.amount = frame["amount"].fillna(0).to_numpy(dtype=np.float64)
+        if (self.amount < 0).any():
+            raise ValueError("Amounts should be non-negative.")
+
+        self.code, self.payment_ids = pd.factorize(frame["payment_id"], sort=False)
+        self.participant_ids = frame["participant_id"].to_numpy()
+        self.minor_units = minor_units
+        self.n = len(self.payment_ids)
+        # payment-level columns may be set on any row of the payment
+        self.split_method = self._per_payment(frame, "split_method", "even")
+        self.description = self._per_payment(frame, "description", "")
+        self.currency = self._per_payment(frame, "currency", None)
+
+        unknown = set(self.split_method) - SPLIT_METHODS_MAPPING.keys()
+        if unknown:
+            raise ValueError(
+                f"Unknown split method '{unknown.pop()}'. " f"Available methods: {list(SPLIT_METHODS_MAPPING.keys())}"
+            )
+
+    def _per_payment(self, frame: "pd.DataFrame", column: str, default: Any) -> List[Any]:
+        if column not in frame.columns:
+            return [default] * self.n
+        column = frame[column]
+        is_set = (column.notna() & (column != "")).to_numpy()
+        # first set row of every payment
+        codes, first = np.unique(self.code[is_set], return_index=True)
+        values = [default] * self.n
+        for code, value in zip(codes.tolist(), column.to_numpy()[is_set][first].tolist()):
+            values[code] = value
+        return values
+
+    def paid_minor(self) -> np.ndarray:
+        return np.rint(self.amount[self.is_paid] * 10**self.minor_units).astype(np.int64)
+
+    def totals(self) -> np.ndarray:
+        return np.bincount(self.code[self.is_paid], weights=self.paid_minor(), minlength=self.n).astype(np.int64)
+
+    @timed("frames.split")
+    def split_minor(self) -> np.ndarray:
+        """
+        Split share of every "share" row in minor units, computed for all payments at once
+        with the same rounding as the split functions.
+        """
+        code = self.code[~self.is_paid]
+        weight = self.amount[~self.is_paid]
+        totals = self.totals()
+        counts = np.bincount(code, minlength=self.n)
+        methods = np.asarray(self.split_method, dtype=object)
+        method = methods[code]
+        # position of every row within its payment
+        order = np.argsort(code, kind="stable")
+        starts = np.cumsum(counts) - counts
+        position = np.empty(len(code), dtype=np.int64)
+        position[order] = np.arange(len(code)) - starts[code[order]]
+
+        shares = np.zeros(len(code), dtype=np.int64)
+
+        even = method == "even"
+        if (counts[methods == "even"] == 0).any():
+            raise ZeroDivisionError("Even split needs at least one participant.")
+        per_head, leftover = np.divmod(totals, np.maximum(counts, 1))
+        shares[even] = per_head[code[even]] + (position[even] < leftover[code[even]])
+
+        exact = method == "exact"
+        shares[exact] = np.rint(weight[exact] * 10**self.minor_units).astype(np.int64)
+        exact_sums = np.bincount(code[exact], weights=shares[exact], minlength=self.n)
+        if (exact_sums != totals)[methods == "exact"].any():
+            raise ValueError("Exact shares must sum to the total payment amount.")
+
+        ratio = method == "ratio"
+        if ratio.any():
+            if ((weight[ratio] < 0) | (weight[ratio] > 1)).any():
+                raise ValueError("Share ratios must be between 0 and 1 (inclusive).")
+            weight_sums = np.bincount(code[ratio], weights=weight[ratio], minlength=self.n)
+            if (np.abs(weight_sums - 1.0) > 1e-9)[methods == "ratio"].any():
+                raise ValueError("Total ratio must equal 1.")
+            # largest remainder per payment, ties going to the earlier row
+            exact_share = totals[code[ratio]] * weight[ratio] / weight_sums[code[ratio]]
+            floor = np.floor(exact_share)
+            leftover = totals - np.bincount(code[ratio], weights=floor, minlength=self.n).astype(np.int64)
+            rank_order = np.lexsort((floor - exact_share, code[ratio]))
+            rank = np.empty(len(rank_order), dtype=np.int64)
+            ratio_counts = np.bincount(code[ratio], minlength=self.n)
+            rank[rank_order] = (
+                np.arange(len(rank_order)) - (np.cumsum(ratio_counts) - ratio_counts)[code[ratio][rank_order]]
+            )
+            shares[ratio] = floor.astype(np.int64) + (rank < leftover[code[ratio]])
+        return shares
+
+
+@timed("frames.balance")
+def frame_balances(
+    frame: "pd.DataFrame", participant_ids: Iterable[str], minor_units: int = MINOR_UNITS
+) -> Dict[Optional[str], np.ndarray]:
+    """
+    Net balances of a long-format payments table without building Payment objects.
+    Totals, splits and the scatter into participants are all vectorized over the table.
+    :param frame: Table with payment_id, participant_id, role ("paid" or "share") and amount columns,
+        and optionally split_method, description and currency.
+    :param participant_ids: Participant ids the balance vectors are aligned with.
+    :param minor_units: Number of minor-unit digits of the amounts.
+    :return: Balance vector in minor units for every currency in the table (None when unset).
+    """
+    entries = _Entries(frame, minor_units)
+    index = _pandas().Index(list(participant_ids))
+    position = index.get_indexer(entries.participant_ids)
+    if (position < 0).any():
+        raise KeyError(f"Unknown participant id '{entries.participant_ids[np.argmin(position)]}'.")
+    amounts = np.empty(len(position), dtype=np.int64)
+    amounts[entries.is_paid] = entries.paid_minor()
+    amounts[~entries.is_paid] = -entries.split_minor()
+
+    currencies, currency_code = np.unique(np.asarray(entries.currency, dtype=str), return_inverse=True)
+    row_currency = currency_code[entries.code]
+    balances = {}
+    for i, currency in enumerate(currencies.tolist()):
+        in_currency = row_currency == i
+        vector = np.zeros(len(index), dtype=np.int64)
+        np.add.at(vector, position[in_currency], amounts[in_currency])
+        balances[None if currency == "None" else currency] = vector
+    return balances
+
+
+def payment_groups_from_frame(frame: "pd.DataFrame") -> List[Tuple[str, ...]]:
+    """
+    Participants of every payment of a long-format table, in order of appearance.
+    """
+    groups = frame.groupby("payment_id", sort=False)["participant_id"].unique()
+    return [tuple(group) for group in groups.tolist()]
+
+
+def payments_from_frame(frame: "pd.DataFrame", minor_units: int = MINOR_UNITS) -> List[Payment]:
+    """
+    Payments of a long-format table, built column-wise with `Payment.from_columns`.
+    :return: The payments, in order of first appearance of their ids.
+    """
+    entries = _Entries(frame, minor_units)
+    contributions: List[Dict[str, float]] = [{} for _ in range(entries.n)]
+    shares: List[Dict[str, float]] = [{} for _ in range(entries.n)]
+    for code, pid, paid, amount in zip(
+        entries.code.tolist(), entries.participant_ids.tolist(), entries.is_paid.tolist(), entries.amount.tolist()
+    ):
+        (contributions if paid else shares)[code][pid] = amount
+
+    payments: List[Optional[Payment]] = [None] * entries.n
+    by_currency: Dict[Optional[str], List[int]] = {}
+    for i, currency in enumerate(entries.currency):
+        by_currency.setdefault(currency, []).append(i)
+    for currency, rows in by_currency.items():
+        batch = Payment.from_columns(
+            [contributions[i] for i in rows],
+            [shares[i] for i in rows],
+            split_method=[entries.split_method[i] for i in rows],
+            description=[entries.description[i] for i in rows],
+            id=[str(entries.payment_ids[i]) for i in rows],
+            minor_units=minor_units,
+            currency=currency,
+        )
+        for i, payment in zip(rows, batch):
+            payments[i] = payment
+    return payments
+
+
+def payments_to_frame(payments: Iterable[Payment]) -> "pd.DataFrame":
+    """
+    Long-format table of `payments`: a "paid" row per payer and a "share" row per sharee,
+    with the input amount and the resulting split in major units.
+    """
+    pd = _pandas()
+    columns: Dict[str, list] = {column: [] for column in LEDGER_COLUMNS + ["split_amount"]}
+    for payment in payments:
+        scale = 10**payment.minor_units
+        rows = [
+            ("paid", pid, amount, payment.contributions_minor[pid] / scale)
+            for pid, amount in payment.participant_contributions.items()
+        ] + [
+            ("share", pid, amount, payment.split_shares_minor[pid] / scale)
+            for pid, amount in payment.input_participant_shares.items()
+        ]
+        for role, pid, amount, split in rows:
+            columns["payment_id"].append(payment.id)
+            columns["participant_id"].append(pid)
+            columns["role"].append(role)
+            columns["amount"].append(float(amount))
+            columns["split_method"].append(payment.split_method)
+            columns["description"].append(payment.description)
+            columns["currency"].append(payment.currency)
+            columns["split_amount"].append(split)
+    return pd.DataFrame(columns)
+
+
+def balances_to_frame(net_balances: Dict[str, float], name_map: Optional[Dict[str, str]] = None) -> "pd.DataFrame":
+    """
+    One row per participant with their net balance (positive: should receive).
+    """
+    pd = _pandas()
+    frame = pd.DataFrame({"participant_id": list(net_balances), "net_balance": list(net_balances.values())})
+    if name_map is not None:
+        frame.insert(1, "name", [name_map[pid] for pid in net_balances])
+    return frame
+
+
+def transactions_to_frame(
+    transactions: List[Dict[str, Any]], name_map: Optional[Dict[str, str]] = None
+) -> "pd.DataFrame":
+    """
+    One row per settlement transaction with "from", "to" and "amount" columns,
+    plus "from_name" and "to_name" when `name_map` is given.
+    """
+    pd = _pandas()
+    frame = pd.DataFrame(transactions, columns=["from", "to", "amount"])
+    if name_map is not None:
+        frame["from_name"] = frame["from"].map(name_map)
+        frame["to_name"] = frame["to"].map(name_map)
+    return frame
@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from FairFare.core import Payment
+
+
+class ColumnarLedger:
+    """
+    Columnar store of payment entries.
+    Participant ids are mapped to dense integer indices and every contribution (positive)
+    and split share (negative) is kept in flat index/amount arrays of integer minor units.
+    Entries are appended once when a payment is added and zeroed out when it is removed,
+    so recomputing the net balances is a single exact scatter-add over the kept arrays
+    instead of a replay of every payment.
+    """
+
+    def __init__(self, participant_ids: Iterable[str]):
+        self.participant_ids: List[str] = list(participant_ids)
+        self.index = {pid: i for i, pid in enumerate(self.participant_ids)}
+        self.entry_index = np.empty(0, dtype=np.int64)
+        self.entry_amount = np.empty(0, dtype=np.int64)
+        # appended entries not yet moved into the arrays, flushed in one concatenate
+        self._pending_index: List[int] = []
+        self._pending_amount: List[int] = []
+        # entry range of every kept payment
+        self.spans: Dict[str, Tuple[int, int]] = {}
+        self._removed = 0
+
+    @classmethod
+    def from_payments(cls, participant_ids: Iterable[str], payments: Iterable[Payment]) -> "ColumnarLedger":
+        ledger = cls(participant_ids)
+        ledger.extend(payments)
+        ledger._flush()
+        return ledger
+
+    def __len__(self) -> int:
+        return len(self.entry_index) + len(self._pending_index)
+
+    def extend(self, payments: Iterable[Payment]):
+        """
+        Append the contributions and split shares of `payments` to the ledger.
+        :param payments: Payments whose participant ids are all known to the ledger.
+        """
+        ids: List[str] = []
+        amounts: List[int] = []
+        start = len(self)
+        spans = {}
+        for pay in payments:
+            contributions, shares = pay.contributions_minor, pay.split_shares_minor
+            ids += contributions
+            ids += shares
+            amounts += contributions.values()
+            amounts += [-share for share in shares.values()]
+            spans[pay.id] = (start, start + len(contributions) + len(shares))
+            start = spans[pay.id][1]
+        indices = list(map(self.index.__getitem__, ids))
+        self._pending_index += indices
+        self._pending_amount += amounts
+        self.spans.update(spans)
+
+    def remove(self, payment_id: str):
+        """
+        Drop the entries of a payment; they are zeroed in place and compacted away once they pile up.
+        """
+        start, stop = self.spans.pop(payment_id)
+        kept = len(self.entry_amount)
+        self.entry_amount[start:stop] = 0
+        for i in range(max(start, kept), stop):
+            self._pending_amount[i - kept] = 0
+        self._removed += stop - start
+        if self._removed > len(self) // 2:
+            self._compact()
+
+    def _flush(self):
+        if self._pending_index:
+            self.entry_index = np.concatenate([self.entry_index, np.array(self._pending_index, dtype=np.int64)])
+            self.entry_amount = np.concatenate([self.entry_amount, np.array(self._pending_amount, dtype=np.int64)])
+            self._pending_index = []
+            self._pending_amount = []
+
+    def _compact(self):
+        self._flush()
+        ranges = list(self.spans.values())
+        keep = np.concatenate([np.arange(start, stop) for start, stop in ranges] or [np.empty(0, dtype=np.int64)])
+        self.entry_index = self.entry_index[keep]
+        self.entry_amount = self.entry_amount[keep]
+        start = 0
+        for payment_id, (old_start, old_stop) in zip(list(self.spans), ranges):
+            self.spans[payment_id] = (start, start + old_stop - old_start)
+            start += old_stop - old_start
+        self._removed = 0
+
+    def net_balances(self) -> np.ndarray:
+        """
+        Net balance of every participant in minor units, aligned with `participant_ids`.
+        Positive: should receive; Negative: should pay.
+        """
+        self._flush()
+        balances = np.zeros(len(self.participant_ids), dtype=np.int64)
+        np.add.at(balances, self.entry_index, self.entry_amount)
+        return balances
@@ -1,7 +1,14 @@
-from typing import Dict, List
+import argparse
+import csv
+import json
+import sys
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO
 
 from FairFare.core import Payment, Person
 from FairFare.settler import ExpenseManager
+from FairFare.utils.mappings import SETTLEMENT_METHODS_MAPPING
 
 
 def get_participants() -> List[Person]:
@@ -87,7 +94,7 @@ def get_payment(participants: List[Person], id_map: Dict[str, str]) -> Payment |
     )
 
 
-def main():
+def run_interactive():
     try:
         # Get participants
         participants = get_participants()
@@ -143,5 +150,142 @@ def main():
         print(f"Error: {e}")
 
 
+def read_participants(path: str) -> List[Person]:
+    """
+    Read participants from a `names.txt` file with one "name, id" pair per line.
+    """
+    participants = []
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                name, pid = line.strip().split(", ")
+                participants.append(Person(name, pid))
+    return participants
+
+
+def _read_json_rows(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r") as f:
+        yield from json.load(f)
+
+
+def _read_jsonl_rows(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_csv_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Long-format CSV with columns payment_id, participant_id, role ("paid" or "share"), amount,
+    and optionally split_method, description and currency. Rows of one payment must be consecutive.
+    """
+    with open(path, "r", newline="") as f:
+        for payment_id, entries in groupby(csv.DictReader(f), key=lambda entry: entry["payment_id"]):
+            row = {"participant_contributions": {}, "input_participant_shares": {}, "id": payment_id}
+            for entry in entries:
+                target = "participant_contributions" if entry["role"] == "paid" else "input_participant_shares"
+                row[target][entry["participant_id"]] = float(entry["amount"] or 0)
+                if entry.get("split_method"):
+                    row["split_method"] = entry["split_method"]
+                if entry.get("description"):
+                    row["description"] = entry["description"]
+                if entry.get("currency"):
+                    row["currency"] = entry["currency"]
+            yield row
+
+
+def read_payments(path: str) -> Iterator[Payment]:
+    """
+    Stream payments from a `payments.json` array, a JSONL file or a long-format CSV file.
+    JSONL and CSV files are read row by row, so only one payment is held in memory at a time.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        rows = _read_jsonl_rows(path)
+    elif suffix == ".csv":
+        rows = _read_csv_rows(path)
+    else:
+        rows = _read_json_rows(path)
+
+    for i, row in enumerate(rows):
+        try:
+            yield Payment(**row)
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid payment at row {i}: {e}") from e
+
+
+def write_results(
+    net_balances: Dict[str, float],
+    transactions: List[Dict[str, Any]],
+    name_map: Dict[str, str],
+    out: TextIO,
+    output_format: str,
+):
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(["from", "to", "amount"])
+        for tx in transactions:
+            writer.writerow([name_map[tx["from"]], name_map[tx["to"]], tx["amount"]])
+        return
+
+    json.dump(
+        {
+            "net_balances": {name_map[pid]: balance for pid, balance in net_balances.items()},
+            "transactions": [
+                {"from": name_map[tx["from"]], "to": name_map[tx["to"]], "amount": tx["amount"]} for tx in transactions
+            ],
+        },
+        out,
+        indent=4,
+    )
+    out.write("\n")
+
+
+def run_batch(args: argparse.Namespace):
+    participants = read_participants(args.names)
+    name_map = {p.id: p.name for p in participants}
+
+    # fold the payments into the running balances as they stream in
+    em = ExpenseManager(participants, [], settlement_method=args.method, currency=args.currency, rates=args.rates)
+    em.fold_payments(read_payments(args.payments))
+    net_balances = em.get_net_balances()
+    transactions = em.settle()
+
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            write_results(net_balances, transactions, name_map, out, args.format)
+    else:
+        write_results(net_balances, transactions, name_map, sys.stdout, args.format)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Split and settle expenses. Runs interactively without a command.")
+    subparsers = parser.add_subparsers(dest="command")
+    settle = subparsers.add_parser("settle", help="Settle a ledger file non-interactively.")
+    settle.add_argument("--names", required=True, help="names.txt with one 'name, id' pair per line.")
+    settle.add_argument("--payments", required=True, help="Payments as a .json array, .jsonl or long-format .csv.")
+    settle.add_argument("--output", help="Write results to this file instead of stdout.")
+    settle.add_argument("--format", choices=["json", "csv"], default="json")
+    settle.add_argument("--method", choices=list(SETTLEMENT_METHODS_MAPPING), default="greedy")
+    settle.add_argument("--currency", help="Settlement currency; payments in other currencies are converted.")
+    settle.add_argument("--rates", help='JSON exchange rate table, e.g. {"base": "EUR", "rates": {"USD": 1.08}}.')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.command != "settle":
+        run_interactive()
+        return 0
+
+    try:
+        run_batch(args)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,7 +1,40 @@
-from typing import Dict, List, Union
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from itertools import chain
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
+import numpy as np
+
+from FairFare import frames
 from FairFare.core import Payment, Person
-from FairFare.utils.mappings import SETTLEMENT_METHODS_MAPPING
+from FairFare.ledger import ColumnarLedger
+from FairFare.utils.fx import RateTable, convert_minor, load_rates
+from FairFare.utils.mappings import GROUP_SETTLEMENT_METHODS, SETTLEMENT_METHODS_MAPPING
+from FairFare.utils.metrics import timed
+from FairFare.utils.money import MINOR_UNITS, Money, to_major
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def payment_groups(payments: Iterable[Payment]) -> List[Tuple[str, ...]]:
+    """
+    Participants (payers and sharees) of every payment, i.e. the cliques of the co-participation graph.
+    """
+    return [tuple(dict.fromkeys(chain(pay.contributions_minor, pay.split_shares_minor))) for pay in payments]
 
 
 class ExpenseManager:
@@ -10,12 +43,66 @@ class ExpenseManager:
         participant_list: List[Person],
         payment_list: List[Payment],
         settlement_method: str = "greedy",
+        columnar: bool = False,
+        settlement_options: Optional[Dict[str, Any]] = None,
+        minor_units: int = MINOR_UNITS,
+        currency: Optional[str] = None,
+        rates: Union[None, RateTable, Mapping[str, float], str] = None,
+        checkpoint: Optional[Mapping[Optional[Tuple[str, int]], np.ndarray]] = None,
     ):
         self.participant_list = participant_list
-        self.payment_list = payment_list
         self.settlement_method = settlement_method
+        # extra keyword arguments for the settlement method, e.g. the "optimal" budgets
+        self.settlement_options = settlement_options or {}
+        self.columnar = columnar
+        self.minor_units = minor_units
+        # settlement currency; payments in other currencies are converted with `rates`
+        self.currency = currency
+        self.rates = load_rates(rates) if rates is not None else None
         self.validate()
         self.id_to_participant = {p.id: p for p in self.participant_list}
+        self.id_to_index = {pid: i for i, pid in enumerate(self.id_to_participant)}
+        # balances of folded and checkpointed payments, keyed like `foreign_balances` with None for
+        # the settlement currency; every balance computation starts from them
+        self.checkpoint_balances: Dict[Optional[Tuple[str, int]], np.ndarray] = {
+            key: np.asarray(vector, dtype=np.int64).copy() for key, vector in (checkpoint or {}).items()
+        }
+        self._fold_parent: Dict[str, str] = {}
+        self._folded_links: List[Tuple[str, str]] = []
+        self.payment_list = payment_list
+
+    @classmethod
+    def from_dataframe(
+        cls, participant_list: List[Person], frame: "pd.DataFrame", fold: bool = False, **kwargs
+    ) -> "ExpenseManager":
+        """
+        Build a manager from a long-format payments table (see `frames.frame_balances`).
+        :param participant_list: Participants referenced by the table.
+        :param frame: Table with payment_id, participant_id, role, amount and optional split_method,
+            description and currency columns.
+        :param fold: Balance the table vectorized into the checkpoint instead of building Payment objects;
+            the payments are then not kept and cannot be edited or exported.
+        :param kwargs: Other ExpenseManager arguments.
+        """
+        if fold:
+            manager = cls(participant_list, [], **kwargs)
+            manager.fold_dataframe(frame)
+            return manager
+        return cls(
+            participant_list, frames.payments_from_frame(frame, kwargs.get("minor_units", MINOR_UNITS)), **kwargs
+        )
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        """
+        Long-format table of the kept payments, one row per payer and sharee.
+        """
+        return frames.payments_to_frame(self.id_to_payment.values())
+
+    def balances_dataframe(self) -> "pd.DataFrame":
+        return frames.balances_to_frame(self.get_net_balances(), {p.id: p.name for p in self.participant_list})
+
+    def settlement_dataframe(self) -> "pd.DataFrame":
+        return frames.transactions_to_frame(self.settle(), {p.id: p.name for p in self.participant_list})
 
     def validate(self):
         if not self.participant_list:
@@ -27,25 +114,533 @@ class ExpenseManager:
                 f"Available methods: {list(SETTLEMENT_METHODS_MAPPING.keys())}"
             )
 
-    def _reset_net_balances(self):
-        for p in self.id_to_participant.values():
-            p.net_balance = 0.0
+    def _foreign_key(self, payment: Payment) -> Optional[Tuple[str, int]]:
+        """
+        (currency, minor units) of a payment that needs conversion, or None for the settlement currency.
+        """
+        if payment.currency is None or payment.currency == self.currency:
+            return None
+        return payment.currency, payment.minor_units
+
+    def _check_currency(self, payment: Payment):
+        if payment.currency is None or payment.currency == self.currency:
+            if payment.minor_units != self.minor_units:
+                raise ValueError(
+                    f"Payment '{payment.id}' uses {payment.minor_units} minor units, expected {self.minor_units}."
+                )
+        elif self.currency is None or self.rates is None:
+            raise ValueError(f"Payment '{payment.id}' is in {payment.currency} but the ledger has no exchange rates.")
+        else:
+            # fails on a missing rate
+            self.rates.rate(payment.currency, self.currency)
+
+    @property
+    def payment_list(self) -> Tuple[Payment, ...]:
+        """
+        The kept payments in insertion order, as a read-only tuple; change them with
+        `add_payment`, `replace_payment` and `remove_payment`, or assign a new list.
+        """
+        return tuple(self.id_to_payment.values())
+
+    @payment_list.setter
+    def payment_list(self, payment_list: List[Payment]):
+        id_to_payment = {}
+        for pay in payment_list:
+            if pay.id in id_to_payment:
+                raise ValueError(f"Duplicate payment id '{pay.id}'.")
+            self._check_currency(pay)
+            id_to_payment[pay.id] = pay
+        self.id_to_payment = id_to_payment
+        # columnar managers keep the entries of their payments, appended once, per currency
+        self.ledgers: Dict[Optional[Tuple[str, int]], ColumnarLedger] = {}
+        self._track(id_to_payment.values())
+        self.balance_expenses()
 
+    @timed("balance_expenses")
     def balance_expenses(self):
-        # reset
-        self._reset_net_balances()
+        """
+        Recompute every net balance from the checkpoint by replaying the payments after it,
+        or with a scatter-add over the kept ledger entries of a columnar manager.
+        Payments in other currencies are balanced per currency and each balance vector
+        is converted in a single vectorized pass.
+        """
+        if self.columnar:
+            balances = {key: ledger.net_balances() for key, ledger in self.ledgers.items()}
+        else:
+            by_currency = self._by_currency(self.id_to_payment.values())
+            balances = {key: self._balance_vector(payments) for key, payments in by_currency.items()}
+        for key in (None, *self.checkpoint_balances):
+            balances.setdefault(key, np.zeros(len(self.id_to_index), dtype=np.int64))
+        for key, vector in self.checkpoint_balances.items():
+            balances[key] += vector
+        self.net_balance_vector = balances.pop(None)
+        # per-currency balances in their own minor units, and their conversions
+        self.foreign_balances = balances
+        self.converted_balances = {key: self._convert(key, vector) for key, vector in self.foreign_balances.items()}
+        for converted in self.converted_balances.values():
+            self.net_balance_vector += converted
+        self._sync_net_balances()
+
+    def _by_currency(self, payments: Iterable[Payment]) -> Dict[Optional[Tuple[str, int]], List[Payment]]:
+        groups = {None: []}
+        for pay in payments:
+            groups.setdefault(self._foreign_key(pay), []).append(pay)
+        return groups
+
+    def _balance_vector(self, payments: List[Payment]) -> np.ndarray:
         # apply payments
-        for pay in self.payment_list:
-            for pid, paid in pay.participant_contributions.items():
-                self.id_to_participant[pid].net_balance += paid
+        balances = [0] * len(self.id_to_index)
+        for pay in payments:
+            for pid, paid in pay.contributions_minor.items():
+                balances[self.id_to_index[pid]] += paid
             # subtract owed shares
-            for pid, share in pay.split_participant_shares.items():
-                self.id_to_participant[pid].net_balance -= share
+            for pid, share in pay.split_shares_minor.items():
+                balances[self.id_to_index[pid]] -= share
+        return np.array(balances, dtype=np.int64)
+
+    def _convert(self, key: Tuple[str, int], vector: np.ndarray) -> np.ndarray:
+        currency, minor_units = key
+        return convert_minor(vector, self.rates.factor(currency, self.currency, minor_units, self.minor_units))
+
+    def _sync_net_balances(self):
+        for p, balance in zip(self.id_to_participant.values(), self.net_balance_vector.tolist()):
+            p.net_balance = to_major(balance, self.minor_units)
+
+    def _apply_payment(self, payment: Payment, sign: int):
+        key = self._foreign_key(payment)
+        if key is None:
+            self._apply_entries(self.net_balance_vector, payment, sign)
+            return
+        # update the balances in the payment currency, then swap in their new conversion
+        self._apply_entries(self._foreign_vector(key), payment, sign)
+        self._reconvert(key)
+
+    def _track(self, payments: Iterable[Payment]):
+        if self.columnar:
+            for key, group in self._by_currency(payments).items():
+                if key not in self.ledgers:
+                    self.ledgers[key] = ColumnarLedger(self.id_to_index)
+                self.ledgers[key].extend(group)
+
+    def _untrack(self, payments: Iterable[Payment]):
+        if self.columnar:
+            for payment in payments:
+                self.ledgers[self._foreign_key(payment)].remove(payment.id)
+
+    def _apply_vector(self, key: Optional[Tuple[str, int]], vector: np.ndarray):
+        if key is None:
+            self.net_balance_vector += vector
+            return
+        self._foreign_vector(key)[:] += vector
+        self._reconvert(key)
+
+    def _foreign_vector(self, key: Tuple[str, int]) -> np.ndarray:
+        if key not in self.foreign_balances:
+            self.foreign_balances[key] = np.zeros(len(self.id_to_index), dtype=np.int64)
+            self.converted_balances[key] = np.zeros(len(self.id_to_index), dtype=np.int64)
+        return self.foreign_balances[key]
+
+    def _reconvert(self, key: Tuple[str, int]):
+        converted = self._convert(key, self.foreign_balances[key])
+        self.net_balance_vector += converted - self.converted_balances[key]
+        self.converted_balances[key] = converted
+
+    def _apply_entries(self, balances: np.ndarray, payment: Payment, sign: int):
+        for pid, paid in payment.contributions_minor.items():
+            balances[self.id_to_index[pid]] += sign * paid
+        for pid, share in payment.split_shares_minor.items():
+            balances[self.id_to_index[pid]] -= sign * share
+
+    def _check_participants(self, payment: Payment):
+        self._check_currency(payment)
+        for pid in (*payment.contributions_minor, *payment.split_shares_minor):
+            if pid not in self.id_to_index:
+                raise KeyError(f"Unknown participant id '{pid}' in payment '{payment.id}'.")
+
+    def has_payment(self, payment_id: str) -> bool:
+        return payment_id in self.id_to_payment
+
+    def add_payment(self, payment: Payment):
+        """
+        Add `payment` and apply only its delta to the running net balances.
+        """
+        if payment.id in self.id_to_payment:
+            raise ValueError(f"Duplicate payment id '{payment.id}'.")
+        self._check_participants(payment)
+        self._apply_payment(payment, 1)
+        self.id_to_payment[payment.id] = payment
+        self._track([payment])
+
+    def add_payments(self, payments: List[Payment]):
+        """
+        Add all of `payments` or none of them, applying only their deltas to the running net balances.
+        """
+        ids = set()
+        for payment in payments:
+            if payment.id in self.id_to_payment or payment.id in ids:
+                raise ValueError(f"Duplicate payment id '{payment.id}'.")
+            self._check_participants(payment)
+            ids.add(payment.id)
+        for payment in payments:
+            self._apply_payment(payment, 1)
+            self.id_to_payment[payment.id] = payment
+        self._track(payments)
+
+    def fold_payments(self, payments: Iterable[Payment]):
+        """
+        Apply the deltas of `payments` to the running net balances and the checkpoint without keeping the payments.
+        Accepts any iterable, so a stream of payments is balanced in constant memory;
+        folded payments cannot be replaced or removed afterwards.
+        """
+        for payment in payments:
+            self._check_participants(payment)
+            self._apply_payment(payment, 1)
+            self._apply_entries(self._checkpoint_vector(self._foreign_key(payment)), payment, 1)
+            self._link_folded(payment)
+
+    def fold_dataframe(self, frame: "pd.DataFrame"):
+        """
+        Fold a long-format payments table into the running net balances and the checkpoint, like
+        `fold_payments`, with splits and balances computed vectorized over the whole table.
+        Amounts in every currency use the ledger minor units.
+        """
+        balances = frames.frame_balances(frame, self.id_to_index, self.minor_units)
+        keys = {}
+        for currency in balances:
+            keys[currency] = None if currency is None or currency == self.currency else (currency, self.minor_units)
+            if keys[currency] is not None:
+                if self.currency is None or self.rates is None:
+                    raise ValueError(f"Payments in {currency} need a ledger currency and exchange rates.")
+                self.rates.rate(currency, self.currency)
+        for currency, vector in balances.items():
+            self._apply_vector(keys[currency], vector)
+            self._checkpoint_vector(keys[currency])[:] += vector
+        for group in frames.payment_groups_from_frame(frame):
+            self._link_folded_ids(group)
+        self._sync_net_balances()
+
+    def _checkpoint_vector(self, key: Optional[Tuple[str, int]]) -> np.ndarray:
+        if key not in self.checkpoint_balances:
+            self.checkpoint_balances[key] = np.zeros(len(self.id_to_index), dtype=np.int64)
+        return self.checkpoint_balances[key]
+
+    def checkpoint(self, upto: Optional[str] = None) -> List[Payment]:
+        """
+        Fold every payment up to and including `upto` (default: all of them) into the checkpoint.
+        The net balances do not change, but later balance computations start from the checkpoint
+        and the folded payments are no longer kept; store the returned payments to archive them.
+        :param upto: Id of the last payment to fold, in insertion order.
+        :return: The folded payments, oldest first.
+        """
+        if upto is not None and upto not in self.id_to_payment:
+            raise KeyError(f"Unknown payment id '{upto}'.")
+        archived = []
+        for payment_id in list(self.id_to_payment):
+            archived.append(self.id_to_payment.pop(payment_id))
+            if payment_id == upto:
+                break
+        self._untrack(archived)
+        for key, payments in self._by_currency(archived).items():
+            if payments:
+                self._checkpoint_vector(key)[:] += self._balance_vector(payments)
+        for payment in archived:
+            self._link_folded(payment)
+        return archived
+
+    def _find_folded(self, pid: str) -> str:
+        parent = self._fold_parent
+        while pid in parent:
+            # path halving
+            if parent[pid] in parent:
+                parent[pid] = parent[parent[pid]]
+            pid = parent[pid]
+        return pid
+
+    def _link_folded(self, payment: Payment):
+        """
+        Keep a spanning forest of the co-participation links of folded payments with a union-find,
+        so graph settlement still works while only O(participants) links are stored.
+        """
+        self._link_folded_ids(chain(payment.contributions_minor, payment.split_shares_minor))
+
+    def _link_folded_ids(self, pids: Iterable[str]):
+        pids = iter(dict.fromkeys(pids))
+        first = next(pids, None)
+        for pid in pids:
+            a, b = self._find_folded(first), self._find_folded(pid)
+            if a != b:
+                self._fold_parent[a] = b
+                self._folded_links.append((first, pid))
+
+    def co_participation_groups(self) -> List[Tuple[str, ...]]:
+        return payment_groups(self.id_to_payment.values()) + self._folded_links
+
+    def replace_payment(self, payment_id: str, payment: Payment):
+        """
+        Replace the payment `payment_id` with `payment`, reverting the old delta and applying the new one.
+        """
+        if payment_id not in self.id_to_payment:
+            raise KeyError(f"Unknown payment id '{payment_id}'.")
+        if payment.id != payment_id and payment.id in self.id_to_payment:
+            raise ValueError(f"Duplicate payment id '{payment.id}'.")
+        self._check_participants(payment)
+        old = self.id_to_payment.pop(payment_id)
+        self._apply_payment(old, -1)
+        self._apply_payment(payment, 1)
+        self.id_to_payment[payment.id] = payment
+        self._untrack([old])
+        self._track([payment])
+
+    def remove_payment(self, payment_id: str) -> Payment:
+        """
+        Remove the payment `payment_id` and revert its delta from the running net balances.
+        """
+        if payment_id not in self.id_to_payment:
+            raise KeyError(f"Unknown payment id '{payment_id}'.")
+        payment = self.id_to_payment.pop(payment_id)
+        self._apply_payment(payment, -1)
+        self._untrack([payment])
+        return payment
+
+    def get_net_balances_minor(self) -> Dict[str, Money]:
+        return dict(zip(self.id_to_participant.keys(), self.net_balance_vector.tolist()))
 
     def get_net_balances(self) -> Dict[str, float]:
-        self.balance_expenses()
+        self._sync_net_balances()
         return {p.id: p.net_balance for p in self.id_to_participant.values()}
 
     def settle(self) -> List[Dict[str, Union[str, float]]]:
-        flows = SETTLEMENT_METHODS_MAPPING[self.settlement_method](self.get_net_balances())
+        options = self.settlement_options
+        if self.settlement_method in GROUP_SETTLEMENT_METHODS:
+            options = {"groups": self.co_participation_groups(), **options}
+        flows = SETTLEMENT_METHODS_MAPPING[self.settlement_method](
+            self.get_net_balances(), minor_units=self.minor_units, **options
+        )
         return flows
+
+    def preview(self, payments: List[Payment]) -> List[Dict[str, Any]]:
+        """
+        What-if settlement of each candidate payment on its own, without changing the ledger.
+        The deltas of all candidates are scattered into one (candidates x participants) matrix and
+        added to the current balance vector at once; only the settlements run per candidate.
+        :param payments: Alternative payments, each scored against the current balances.
+        :return: Per candidate, the "net_balances" and "transactions" the ledger would have with it added.
+        """
+        for payment in payments:
+            self._check_participants(payment)
+        rows, cols, amounts = [], [], []
+        for row, payment in enumerate(payments):
+            for pid, paid in payment.contributions_minor.items():
+                rows.append(row)
+                cols.append(self.id_to_index[pid])
+                amounts.append(paid)
+            for pid, share in payment.split_shares_minor.items():
+                rows.append(row)
+                cols.append(self.id_to_index[pid])
+                amounts.append(-share)
+        deltas = np.zeros((len(payments), len(self.id_to_index)), dtype=np.int64)
+        np.add.at(deltas, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)), amounts)
+
+        # candidates in other currencies change the ledger by the change of their currency's conversion
+        for row, payment in enumerate(payments):
+            key = self._foreign_key(payment)
+            if key is not None:
+                current = self.foreign_balances.get(key, np.zeros(len(self.id_to_index), dtype=np.int64))
+                converted = self.converted_balances.get(key, np.zeros(len(self.id_to_index), dtype=np.int64))
+                deltas[row] = self._convert(key, current + deltas[row]) - converted
+        balances = self.net_balance_vector + deltas
+
+        ids = list(self.id_to_participant)
+        base_groups = self.co_participation_groups() if self.settlement_method in GROUP_SETTLEMENT_METHODS else None
+        previews = []
+        for payment, row in zip(payments, balances.tolist()):
+            net_balances = {pid: to_major(balance, self.minor_units) for pid, balance in zip(ids, row)}
+            options = self.settlement_options
+            if base_groups is not None:
+                options = {"groups": base_groups + payment_groups([payment]), **options}
+            transactions = SETTLEMENT_METHODS_MAPPING[self.settlement_method](
+                net_balances, minor_units=self.minor_units, **options
+            )
+            previews.append({"net_balances": net_balances, "transactions": transactions})
+        return previews
+
+
+# A group packed for a worker process: participant ids, entry index/amount arrays, minor units,
+# and the payment groups for the methods that need them
+PackedGroup = Tuple[Hashable, Tuple[str, ...], np.ndarray, np.ndarray, int, Optional[List[Tuple[str, ...]]]]
+
+
+def _pack_group(
+    key: Hashable, participants: List[Person], payments: List[Payment], minor_units: int, with_groups: bool = False
+) -> PackedGroup:
+    ids = tuple(dict.fromkeys(p.id for p in participants))
+    if not ids:
+        raise ValueError("At least one participant is required.")
+    if len({payment.currency for payment in payments}) > 1:
+        raise ValueError("Payments of a group must all be in one currency.")
+    for payment in payments:
+        if payment.minor_units != minor_units:
+            raise ValueError(f"Payment '{payment.id}' uses {payment.minor_units} minor units, expected {minor_units}.")
+    ledger = ColumnarLedger.from_payments(ids, payments)
+    groups = payment_groups(payments) if with_groups else None
+    return key, ids, ledger.entry_index, ledger.entry_amount, minor_units, groups
+
+
+def _settle_chunk(
+    chunk: List[PackedGroup], settlement_method: str, settlement_options: Dict[str, Any]
+) -> List[Tuple[Hashable, Dict[str, Any]]]:
+    results = []
+    for key, ids, entry_index, entry_amount, minor_units, groups in chunk:
+        try:
+            minor = np.zeros(len(ids), dtype=np.int64)
+            np.add.at(minor, entry_index, entry_amount)
+            net_balances = {pid: to_major(balance, minor_units) for pid, balance in zip(ids, minor.tolist())}
+            options = settlement_options if groups is None else {"groups": groups, **settlement_options}
+            transactions = SETTLEMENT_METHODS_MAPPING[settlement_method](
+                net_balances, minor_units=minor_units, **options
+            )
+            results.append((key, {"net_balances": net_balances, "transactions": transactions}))
+        except Exception as e:
+            results.append((key, {"error": f"{type(e).__name__}: {e}"}))
+    return results
+
+
+def settle_many(
+    groups: Union[Mapping[Hashable, Tuple[List[Person], List[Payment]]], Iterable[Tuple[Hashable, Tuple]]],
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    settlement_method: str = "greedy",
+    settlement_options: Optional[Dict[str, Any]] = None,
+    minor_units: int = MINOR_UNITS,
+) -> Iterator[Tuple[Hashable, Dict[str, Any]]]:
+    """
+    Settle many independent groups in parallel over a process pool.
+    Each group is packed into flat index/amount arrays and sent to the workers in chunks
+    of `chunk_size` groups, instead of pickling Person/Payment objects one by one.
+    Results stream back as chunks complete, in no particular order.
+    :param groups: Mapping, or iterable of pairs, from group key to (participants, payments).
+    :param workers: Number of worker processes (default: CPU count); 1 settles in-process.
+    :return: Iterator of (key, result) where result has "net_balances" and "transactions",
+        or "error" if that group failed. A failing group does not affect the others.
+    """
+    if settlement_method not in SETTLEMENT_METHODS_MAPPING:
+        raise ValueError(
+            f"Unknown settlement_method '{settlement_method}'. "
+            f"Available methods: {list(SETTLEMENT_METHODS_MAPPING.keys())}"
+        )
+    settlement_options = settlement_options or {}
+    items = groups.items() if isinstance(groups, Mapping) else groups
+
+    def chunks() -> Iterator[Tuple[List[PackedGroup], List[Tuple[Hashable, Dict[str, Any]]]]]:
+        packed, failed = [], []
+        for key, (participants, payments) in items:
+            try:
+                packed.append(
+                    _pack_group(key, participants, payments, minor_units, settlement_method in GROUP_SETTLEMENT_METHODS)
+                )
+            except Exception as e:
+                failed.append((key, {"error": f"{type(e).__name__}: {e}"}))
+            if len(packed) + len(failed) >= chunk_size:
+                yield packed, failed
+                packed, failed = [], []
+        if packed or failed:
+            yield packed, failed
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for packed, failed in chunks():
+            yield from failed
+            yield from _settle_chunk(packed, settlement_method, settlement_options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep a bounded number of chunks in flight so huge inputs are not packed all at once
+        pending = {}
+        for packed, failed in chunks():
+            yield from failed
+            future = executor.submit(_settle_chunk, packed, settlement_method, settlement_options)
+            pending[future] = [group[0] for group in packed]
+            if len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from _chunk_results(future, pending.pop(future))
+        for future in as_completed(pending):
+            yield from _chunk_results(future, pending[future])
+
+
+def _chunk_results(future: Future, keys: List[Hashable]) -> List[Tuple[Hashable, Dict[str, Any]]]:
+    try:
+        return future.result()
+    except Exception as e:
+        # the worker itself failed (e.g. it crashed); report it for every group of the chunk
+        return [(key, {"error": f"{type(e).__name__}: {e}"}) for key in keys]
+
+
+def settle_across(
+    managers: Union[Mapping[Hashable, ExpenseManager], Iterable[ExpenseManager]],
+    identity: Union[None, Mapping[str, Hashable], Callable[[Person], Hashable]] = None,
+    settlement_method: str = "greedy",
+    settlement_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Net every person's balances across many groups and settle them once, so two people who share
+    several groups exchange at most one transfer instead of one per group.
+    Participants are mapped to a shared identity and each group's balance vector is scatter-added
+    into one merged vector over its non-zero entries only, so the merge costs O(non-zero balances)
+    and the single settlement is as cheap as settling one large group.
+    :param managers: The groups to net, as a mapping from group key to manager or just the managers.
+    :param identity: Shared identity of a participant, as a mapping from participant id (ids that are
+        missing keep their own id) or a function of the Person; by default participants with the
+        same id are the same person.
+    :return: "net_balances" by identity and the "transactions" between identities.
+    """
+    if settlement_method not in SETTLEMENT_METHODS_MAPPING:
+        raise ValueError(
+            f"Unknown settlement_method '{settlement_method}'. "
+            f"Available methods: {list(SETTLEMENT_METHODS_MAPPING.keys())}"
+        )
+    managers = list(managers.values() if isinstance(managers, Mapping) else managers)
+    if not managers:
+        raise ValueError("At least one group is required.")
+
+    def identity_of(person: Person) -> Hashable:
+        if identity is None:
+            return person.id
+        if isinstance(identity, Mapping):
+            return identity.get(person.id, person.id)
+        return identity(person)
+
+    minor_units = managers[0].minor_units
+    currency = managers[0].currency
+    index: Dict[Hashable, int] = {}
+    parts = []
+    for manager in managers:
+        if manager.minor_units != minor_units or manager.currency != currency:
+            raise ValueError("All groups must settle in the same currency and minor units.")
+        vector = manager.net_balance_vector
+        # position of every local participant in the merged vector
+        positions = np.fromiter(
+            (index.setdefault(identity_of(p), len(index)) for p in manager.id_to_participant.values()),
+            dtype=np.int64,
+            count=len(vector),
+        )
+        nonzero = np.flatnonzero(vector)
+        parts.append((positions, positions[nonzero], vector[nonzero]))
+
+    merged = np.zeros(len(index), dtype=np.int64)
+    for _, positions, amounts in parts:
+        np.add.at(merged, positions, amounts)
+    identities = list(index)
+    net_balances = {key: to_major(balance, minor_units) for key, balance in zip(identities, merged.tolist())}
+
+    options = settlement_options or {}
+    if settlement_method in GROUP_SETTLEMENT_METHODS:
+        # co-participation carries over: identities that shared a payment in any group are linked
+        groups = [
+            tuple(identities[positions[manager.id_to_index[pid]]] for pid in group)
+            for manager, (positions, _, _) in zip(managers, parts)
+            for group in manager.co_participation_groups()
+        ]
+        options = {"groups": groups, **options}
+    transactions = SETTLEMENT_METHODS_MAPPING[settlement_method](net_balances, minor_units=minor_units, **options)
+    return {"net_balances": net_balances, "transactions": transactions}
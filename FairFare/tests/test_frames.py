@@ -0,0 +1,98 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from FairFare.core import Payment, Person
+from FairFare.frames import frame_balances
+from FairFare.settler import ExpenseManager
+
+pd = pytest.importorskip("pandas")
+
+
+def random_payments(participants, n, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [p.id for p in participants]
+    payments = []
+    for _ in range(n):
+        payers = rng.choice(ids, size=rng.integers(1, 3), replace=False).tolist()
+        sharees = rng.choice(ids, size=rng.integers(1, 5), replace=False).tolist()
+        contributions = {pid: float(rng.integers(1, 10_000)) / 100 for pid in payers}
+        method = rng.choice(["even", "exact", "ratio"])
+        if method == "exact":
+            # cents that add up to the total
+            cuts = np.sort(rng.integers(0, round(sum(contributions.values()) * 100), size=len(sharees) - 1))
+            parts = np.diff([0, *cuts, round(sum(contributions.values()) * 100)])
+            shares = {pid: int(part) / 100 for pid, part in zip(sharees, parts)}
+        elif method == "ratio":
+            shares = {pid: 1 / len(sharees) for pid in sharees}
+        else:
+            shares = {pid: 0.0 for pid in sharees}
+        payments.append(Payment(contributions, shares, str(method)))
+    return payments
+
+
+def test_frame_balances_match_payments():
+    participants = [Person(f"P{i}") for i in range(6)]
+    payments = random_payments(participants, 300)
+    manager = ExpenseManager(participants, payments)
+    frame = manager.to_dataframe()
+
+    balances = frame_balances(frame, manager.id_to_index)
+    assert list(balances) == [None]
+    np.testing.assert_array_equal(balances[None], manager.net_balance_vector)
+
+    folded = ExpenseManager.from_dataframe(participants, frame, fold=True)
+    assert folded.get_net_balances() == manager.get_net_balances()
+    assert folded.settle() == manager.settle()
+
+
+def test_dataframe_round_trip():
+    alice, bob, carol = Person("Alice"), Person("Bob"), Person("Carol")
+    manager = ExpenseManager([alice, bob, carol], [])
+    first = Payment({alice.id: 10}, {alice.id: 0, bob.id: 0, carol.id: 0}, "even", "dinner")
+    second = Payment({bob.id: 6, carol.id: 4}, {alice.id: 0.5, bob.id: 0.25, carol.id: 0.25}, "ratio")
+    manager.add_payments([first, second])
+
+    frame = manager.to_dataframe()
+    assert frame["role"].tolist() == ["paid", "share", "share", "share", "paid", "paid", "share", "share", "share"]
+    assert frame["split_amount"].tolist()[:4] == [10.0, 3.34, 3.33, 3.33]
+
+    copy = ExpenseManager.from_dataframe([alice, bob, carol], frame.drop(columns="split_amount"))
+    assert [p.id for p in copy.payment_list] == [first.id, second.id]
+    assert copy.payment_list[0].description == "dinner"
+    assert copy.get_net_balances() == manager.get_net_balances()
+
+    balances = manager.balances_dataframe()
+    assert balances["name"].tolist() == ["Alice", "Bob", "Carol"]
+    assert balances["net_balance"].sum() == pytest.approx(0)
+    transactions = manager.settlement_dataframe()
+    assert transactions.columns.tolist() == ["from", "to", "amount", "from_name", "to_name"]
+    assert transactions["amount"].sum() == pytest.approx(sum(tx["amount"] for tx in manager.settle()))
+
+
+def test_frame_validation():
+    ids = ["a", "b"]
+    frame = pd.DataFrame(
+        {
+            "payment_id": ["x", "x", "x"],
+            "participant_id": ["a", "a", "b"],
+            "role": ["paid", "share", "share"],
+            "amount": [10.0, 4.0, 5.0],
+            "split_method": ["exact", None, None],
+        }
+    )
+    with pytest.raises(ValueError, match="sum to the total"):
+        frame_balances(frame, ids)
+    with pytest.raises(ValueError, match="Roles"):
+        frame_balances(frame.assign(role=["paid", "owes", "share"]), ids)
+    with pytest.raises(KeyError):
+        frame_balances(frame.assign(participant_id=["a", "a", "c"], split_method="even"), ids)
+    balances = frame_balances(frame.assign(currency="USD", split_method="even"), ids)
+    assert balances["USD"].tolist() == [5_00, -5_00]
+
+
+def test_pandas_is_imported_lazily():
+    code = "import sys, FairFare.runner, FairFare.web; print('pandas' in sys.modules)"
+    assert subprocess.check_output([sys.executable, "-c", code], text=True).strip() == "False"
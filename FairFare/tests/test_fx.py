@@ -0,0 +1,34 @@
+import json
+
+import numpy as np
+import pytest
+
+from FairFare.utils.fx import RateTable, convert_minor, load_rates
+
+
+def test_rate_table():
+    rates = RateTable.from_mapping({"base": "EUR", "rates": {"USD": 1.25, "JPY": 160.0}})
+    assert rates.rate("EUR", "USD") == 1.25
+    assert rates.rate("USD", "JPY") == 128.0
+    # 1 JPY (no minor units) is 0.78125 cents
+    assert rates.factor("JPY", "USD", 0, 2) == pytest.approx(1.25 / 160 * 100)
+    with pytest.raises(ValueError):
+        rates.rate("EUR", "GBP")
+    with pytest.raises(ValueError):
+        RateTable({"USD": 0})
+
+
+def test_load_rates_caches_files(tmp_path):
+    path = tmp_path / "rates.json"
+    path.write_text(json.dumps({"base": "EUR", "rates": {"USD": 1.25}}))
+    assert load_rates(str(path)) is load_rates(path)
+    assert load_rates({"USD": 1.25}).rate("USD", "USD") == 1.0
+
+
+def test_convert_minor_keeps_zero_sum():
+    rng = np.random.default_rng(0)
+    amounts = rng.integers(-100_000, 100_000, size=1_000)
+    amounts[-1] -= amounts.sum()
+    converted = convert_minor(amounts, 1 / 3)
+    assert converted.sum() == 0
+    assert np.abs(converted - amounts / 3).max() < 1
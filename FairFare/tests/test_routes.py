@@ -0,0 +1,324 @@
+import json
+
+import pytest
+
+from FairFare.web import create_app
+from FairFare.web.store import create_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def client(request, tmp_path):
+    url = "memory" if request.param == "memory" else f"sqlite:///{tmp_path / 'fairfare.db'}"
+    app = create_app(create_store(url))
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+def add_payment(client, payers, amounts, shares, share_amounts=None, split_method="even", id=None):
+    return client.post(
+        "/api/add_payment",
+        json={
+            "id": id,
+            "description": "test",
+            "payers": payers,
+            "amounts": amounts,
+            "shares": shares,
+            "share_amounts": share_amounts or [0] * len(shares),
+            "split_method": split_method,
+        },
+    )
+
+
+def test_add_edit_delete_payment(client):
+    client.post("/api/initialize", json={"names": ["Alice", "Bob", "Charlie"]})
+
+    first = add_payment(client, ["Alice"], [90], ["Alice", "Bob", "Charlie"]).get_json()["payment"]
+    second = add_payment(client, ["Bob"], [30], ["Alice", "Bob"]).get_json()["payment"]
+    assert client.get("/api/settle").get_json()["net_balances"] == {"Alice": 45.0, "Bob": -15.0, "Charlie": -30.0}
+
+    edited = add_payment(client, ["Alice"], [60], ["Bob", "Charlie"], id=first["id"]).get_json()["payment"]
+    assert [p["id"] for p in client.get("/api/payments").get_json()] == [second["id"], edited["id"]]
+    assert client.get("/api/settle").get_json()["net_balances"] == {"Alice": 45.0, "Bob": -15.0, "Charlie": -30.0}
+
+    assert client.delete(f"/api/payments/{second['id']}").get_json() == {"success": True}
+    assert client.get("/api/settle").get_json()["net_balances"] == {"Alice": 60.0, "Bob": -30.0, "Charlie": -30.0}
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fairfare.db'}"
+    worker_a = create_app(create_store(url)).test_client()
+    worker_b = create_app(create_store(url)).test_client()
+
+    worker_a.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    worker_b.set_cookie("session_id", worker_a.get_cookie("session_id").value)
+    payment = add_payment(worker_a, ["Alice"], [10], ["Alice", "Bob"]).get_json()["payment"]
+    assert worker_b.get("/api/settle").get_json()["net_balances"] == {"Alice": 5.0, "Bob": -5.0}
+
+    worker_b.delete(f"/api/payments/{payment['id']}")
+    assert worker_a.get("/api/payments").get_json() == []
+    assert worker_a.get("/api/settle").get_json()["net_balances"] == {"Alice": 0.0, "Bob": 0.0}
+
+
+@pytest.mark.parametrize("url", ["/api/settle", "/api/payments"])
+def test_unchanged_ledger_returns_304(client, url):
+    client.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    add_payment(client, ["Alice"], [10], ["Alice", "Bob"])
+
+    first = client.get(url)
+    assert first.status_code == 200 and first.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    add_payment(client, ["Bob"], [4], ["Alice", "Bob"])
+    changed = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_bulk_payments(client):
+    client.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    rows = [
+        {"description": "a", "payers": ["Alice"], "amounts": [10], "shares": ["Alice", "Bob"], "split_method": "even"},
+        {"description": "b", "payers": ["Dave"], "amounts": [10], "shares": ["Alice"], "split_method": "even"},
+        {"description": "c", "payers": ["Bob"], "amounts": [4], "shares": ["Alice"], "split_method": "exact"},
+    ]
+    for row in rows:
+        row["share_amounts"] = [4] * len(row["shares"]) if row["split_method"] == "exact" else [0] * len(row["shares"])
+
+    result = client.post("/api/payments/bulk", json=rows).get_json()
+    assert result["added"] == 2
+    assert [error["row"] for error in result["errors"]] == [1]
+
+    ndjson = "\n".join(json.dumps(row) for row in rows[:1] + ["not a payment"])
+    result = client.post("/api/payments/bulk", data=ndjson, content_type="application/x-ndjson").get_json()
+    assert result["added"] == 1 and len(result["errors"]) == 1
+
+    assert len(client.get("/api/payments").get_json()) == 3
+    assert client.get("/api/settle").get_json()["net_balances"] == {"Alice": 6.0, "Bob": -6.0}
+
+
+def test_metrics(client):
+    from FairFare.utils import metrics
+
+    metrics.REGISTRY.reset()
+    client.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    add_payment(client, ["Alice"], [10], ["Alice", "Bob"])
+    client.get("/api/settle")
+
+    response = client.get("/api/metrics")
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'fairfare_stage_seconds_count{stage="route.add_payment"} 1' in body
+    # single payments are covered by their route; only coarse stages are timed
+    assert 'stage="payment.init"' not in body
+    assert 'fairfare_stage_seconds_count{stage="settle.greedy"} 1' in body
+    assert 'fairfare_stage_seconds_bucket{stage="route.settle",le="+Inf"} 1' in body
+    assert "fairfare_sessions 1" in body
+    assert "fairfare_payments 1" in body
+
+    metrics.set_enabled(False)
+    try:
+        client.get("/api/settle")
+        assert 'fairfare_stage_seconds_count{stage="route.settle"} 1' in client.get("/api/metrics").get_data(
+            as_text=True
+        )
+    finally:
+        metrics.set_enabled(True)
+
+
+def test_checkpoint(client):
+    client.post("/api/initialize", json={"names": ["Alice", "Bob", "Charlie"]})
+    first = add_payment(client, ["Alice"], [90], ["Alice", "Bob", "Charlie"]).get_json()["payment"]
+    second = add_payment(client, ["Bob"], [30], ["Alice", "Bob"]).get_json()["payment"]
+    third = add_payment(client, ["Charlie"], [20], ["Bob", "Charlie"]).get_json()["payment"]
+    before = client.get("/api/settle").get_json()
+
+    assert client.post("/api/checkpoint", json={"upto": second["id"]}).get_json() == {"archived": 2}
+    assert [p["id"] for p in client.get("/api/payments").get_json()] == [third["id"]]
+    assert [p["id"] for p in client.get("/api/payments/archived").get_json()] == [first["id"], second["id"]]
+    assert client.get("/api/settle").get_json() == before
+    # archived payments leave the live count on every store
+    assert "fairfare_payments 1" in client.get("/api/metrics").get_data(as_text=True)
+
+    client.delete(f"/api/payments/{third['id']}")
+    assert client.get("/api/settle").get_json()["net_balances"] == {"Alice": 45.0, "Bob": -15.0, "Charlie": -30.0}
+
+    assert client.post("/api/checkpoint").get_json() == {"archived": 0}
+    assert client.post("/api/checkpoint", json={"upto": "unknown"}).status_code == 400
+
+
+def test_sqlite_checkpoint_survives_reload(tmp_path):
+    url = f"sqlite:///{tmp_path / 'fairfare.db'}"
+    client = create_app(create_store(url)).test_client()
+    client.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    add_payment(client, ["Alice"], [10], ["Alice", "Bob"])
+    client.post("/api/checkpoint")
+    add_payment(client, ["Bob"], [4], ["Alice", "Bob"])
+
+    other_worker = create_app(create_store(url)).test_client()
+    other_worker.set_cookie("session_id", client.get_cookie("session_id").value)
+    assert other_worker.get("/api/settle").get_json()["net_balances"] == {"Alice": 3.0, "Bob": -3.0}
+    assert len(other_worker.get("/api/payments").get_json()) == 1
+    assert len(other_worker.get("/api/payments/archived").get_json()) == 1
+
+
+def test_paginated_payments(client):
+    client.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    ids = [add_payment(client, ["Alice"], [i + 1], ["Alice", "Bob"]).get_json()["payment"]["id"] for i in range(5)]
+    assert [p["id"] for p in client.get("/api/payments").get_json()] == ids
+
+    page = client.get("/api/payments?limit=2").get_json()
+    assert [p["id"] for p in page["payments"]] == ids[:2]
+
+    # a payment deleted before the cursor does not shift the next page
+    client.delete(f"/api/payments/{ids[0]}")
+    page = client.get(f"/api/payments?limit=2&cursor={page['next_cursor']}").get_json()
+    assert [p["id"] for p in page["payments"]] == ids[2:4]
+    last = client.get(f"/api/payments?limit=2&cursor={page['next_cursor']}").get_json()
+    assert [p["id"] for p in last["payments"]] == ids[4:]
+    assert last["next_cursor"] is None
+
+    assert client.get("/api/payments?limit=0").status_code == 400
+
+
+def test_compact_payments(client):
+    client.post("/api/initialize", json={"names": ["Alice", "Bob", "Charlie"]})
+    first = add_payment(client, ["Alice"], [90], ["Alice", "Bob", "Charlie"]).get_json()["payment"]
+    second = add_payment(client, ["Bob", "Charlie"], [20, 10], ["Alice"]).get_json()["payment"]
+
+    compact = client.get("/api/payments?format=compact").get_json()
+    assert [p["name"] for p in compact["participants"]] == ["Alice", "Bob", "Charlie"]
+    columns = compact["payments"]
+    assert columns["id"] == [first["id"], second["id"]]
+    assert columns["paid_by"] == [[0], [1, 2]]
+    assert columns["paid"] == [[90.0], [20.0, 10.0]]
+    assert columns["shares"] == [[0, 1, 2], [0]]
+    assert columns["share_amounts"] == [[30.0, 30.0, 30.0], [30.0]]
+    assert compact["next_cursor"] is None
+
+    page = client.get("/api/payments?format=compact&limit=1").get_json()
+    assert page["payments"]["id"] == [first["id"]] and page["next_cursor"]
+
+
+def test_changes(client):
+    client.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    first = add_payment(client, ["Alice"], [10], ["Alice", "Bob"]).get_json()["payment"]
+
+    full = client.get("/api/changes").get_json()
+    assert full["reset"] and [p["id"] for p in full["upserted"]] == [first["id"]]
+    assert full["net_balances"] == {"Alice": 5.0, "Bob": -5.0}
+
+    second = add_payment(client, ["Bob"], [4], ["Alice", "Bob"]).get_json()["payment"]
+    edited = add_payment(client, ["Alice"], [20], ["Alice", "Bob"], id=first["id"]).get_json()["payment"]
+    delta = client.get(f"/api/changes?since={full['version']}").get_json()
+    assert not delta["reset"]
+    assert [p["id"] for p in delta["upserted"]] == [second["id"], edited["id"]]
+    assert delta["deleted"] == [first["id"]]
+    assert delta["net_balances"] == {"Alice": 8.0, "Bob": -8.0}
+
+    client.delete(f"/api/payments/{second['id']}")
+    latest = client.get(f"/api/changes?since={delta['version']}").get_json()
+    assert latest["upserted"] == [] and latest["deleted"] == [second["id"]]
+    assert client.get(f"/api/changes?since={latest['version']}").get_json()["deleted"] == []
+
+    # versions from before the session was re-created need a full reload
+    client.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    assert client.get(f"/api/changes?since={latest['version']}").get_json()["reset"]
+    assert client.get("/api/changes?since=1000").status_code == 400
+
+
+def test_cookieless_clients_get_their_own_session(client):
+    assert client.get("/api/settle").status_code == 400
+    client.post("/api/initialize", json={"names": ["Alice", "Bob"]})
+    session_id = client.get_cookie("session_id").value
+    add_payment(client, ["Alice"], [10], ["Alice", "Bob"])
+
+    other = client.application.test_client()
+    assert other.get("/api/payments").status_code == 400
+    other.post("/api/initialize", json={"names": ["Carol"]})
+    assert other.get_cookie("session_id").value != session_id
+    assert other.get("/api/payments").get_json() == []
+    assert len(client.get("/api/payments").get_json()) == 1
+
+
+def read_event(chunks):
+    # skip the retry hint and keep-alive comments
+    for chunk in chunks:
+        text = chunk.decode()
+        if text.startswith("id: "):
+            return json.loads(text.split("data: ", 1)[1])
+
+
+def test_event_stream(client):
+    # off by default: a sync worker would be held by every open page
+    assert client.post("/api/initialize", json={"names": ["Alice", "Bob"]}).get_json()["events"] is False
+    assert client.get("/api/events").status_code == 404
+    client.application.config["EVENT_STREAMS"] = True
+    assert client.post("/api/initialize", json={"names": ["Alice", "Bob"]}).get_json()["events"] is True
+    assert client.get_cookie("session_id")
+    hub = client.application.config["EVENT_HUB"]
+
+    first = client.get("/api/events")
+    second = client.get("/api/events")
+    assert first.mimetype == "text/event-stream"
+    assert hub.subscriber_count() == 2
+    streams = [iter(first.response), iter(second.response)]
+
+    payment = add_payment(client, ["Alice"], [10], ["Alice", "Bob"]).get_json()["payment"]
+    events = [read_event(stream) for stream in streams]
+    # built once and fanned out to both subscribers
+    assert events[0] == events[1]
+    assert [p["id"] for p in events[0]["upserted"]] == [payment["id"]]
+    assert events[0]["net_balances"] == {"Alice": 5.0, "Bob": -5.0}
+    assert events[0]["transactions"] == [{"from": "Bob", "to": "Alice", "amount": 5.0}]
+
+    client.delete(f"/api/payments/{payment['id']}")
+    event = read_event(streams[0])
+    assert event["since"] == events[0]["version"] and event["deleted"] == [payment["id"]]
+
+    first.close()
+    second.close()
+    assert hub.subscriber_count() == 0
+
+
+def test_settle_preview(client):
+    client.post("/api/initialize", json={"names": ["Alice", "Bob", "Charlie"]})
+    add_payment(client, ["Alice"], [30], ["Alice", "Bob", "Charlie"])
+    before = client.get("/api/settle").get_json()
+    payments = client.get("/api/payments").get_json()
+
+    candidates = [
+        {
+            "description": "taxi",
+            "payers": ["Bob"],
+            "amounts": [20],
+            "shares": ["Bob", "Charlie"],
+            "split_method": "even",
+        },
+        {
+            "description": "lunch",
+            "payers": ["Charlie"],
+            "amounts": [9],
+            "shares": ["Alice", "Charlie"],
+            "share_amounts": [6, 3],
+            "split_method": "exact",
+        },
+    ]
+    for candidate in candidates:
+        candidate.setdefault("share_amounts", [0] * len(candidate["shares"]))
+    previews = client.post("/api/settle/preview", json={"payments": candidates}).get_json()["previews"]
+    assert previews[0]["net_balances"] == {"Alice": 20.0, "Bob": 0.0, "Charlie": -20.0}
+    assert previews[0]["transactions"] == [{"from": "Charlie", "to": "Alice", "amount": 20.0}]
+    assert previews[1]["net_balances"] == {"Alice": 14.0, "Bob": -10.0, "Charlie": -4.0}
+
+    # matches actually adding the payment, which the preview did not do
+    single = client.post("/api/settle/preview", json=candidates[0]).get_json()["previews"]
+    assert single == previews[:1]
+    assert client.get("/api/settle").get_json() == before
+    assert client.get("/api/payments").get_json() == payments
+    add_payment(client, ["Bob"], [20], ["Bob", "Charlie"])
+    assert client.get("/api/settle").get_json() == previews[0]
+
+    assert client.post("/api/settle/preview", json={"payments": []}).status_code == 400
+    unknown = dict(candidates[0], payers=["Dave"])
+    assert client.post("/api/settle/preview", json=unknown).status_code == 400
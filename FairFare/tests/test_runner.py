@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from FairFare.runner import main
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+TEST_CASES = ["test_case_1", "test_case_2"]
+
+
+def load_expected(path: str):
+    with open(DATA_DIR / path / "expected_net.json", "r") as f:
+        expected_net = json.load(f)
+    with open(DATA_DIR / path / "expected_transactions.json", "r") as f:
+        expected_transactions = json.load(f)
+    return expected_net, expected_transactions
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+@pytest.mark.parametrize("path", TEST_CASES)
+def test_batch_settle(path: str, suffix: str, tmp_path, capsys):
+    payments_file = DATA_DIR / path / "payments.json"
+    if suffix == ".jsonl":
+        with open(payments_file, "r") as f:
+            rows = json.load(f)
+        payments_file = tmp_path / "payments.jsonl"
+        payments_file.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    assert main(["settle", "--names", str(DATA_DIR / path / "names.txt"), "--payments", str(payments_file)]) == 0
+    result = json.loads(capsys.readouterr().out)
+
+    expected_net, expected_transactions = load_expected(path)
+    assert result["net_balances"] == expected_net
+    assert sorted(result["transactions"], key=lambda x: (x["from"], x["to"])) == sorted(
+        expected_transactions, key=lambda x: (x["from"], x["to"])
+    )
+
+
+def test_batch_settle_csv(tmp_path):
+    payments_file = tmp_path / "payments.csv"
+    payments_file.write_text(
+        "payment_id,participant_id,role,amount,split_method,description\n"
+        "1,Alice,paid,90,even,dinner\n"
+        "1,Alice,share,0,,\n"
+        "1,Bob,share,0,,\n"
+        "2,Bob,paid,10,exact,taxi\n"
+        "2,Alice,share,10,,\n"
+    )
+    output_file = tmp_path / "transactions.csv"
+    names_file = str(DATA_DIR / "test_case_1" / "names.txt")
+
+    args = ["settle", "--names", names_file, "--payments", str(payments_file), "--format", "csv"]
+    assert main(args + ["--output", str(output_file)]) == 0
+    assert output_file.read_text().splitlines() == ["from,to,amount", "Bob,Alice,35.0"]
+
+
+def test_batch_settle_reports_invalid_rows(tmp_path, capsys):
+    payments_file = tmp_path / "payments.jsonl"
+    payments_file.write_text(json.dumps({"participant_contributions": {"Alice": -1}, "input_participant_shares": {}}))
+    names_file = str(DATA_DIR / "test_case_1" / "names.txt")
+
+    assert main(["settle", "--names", names_file, "--payments", str(payments_file)]) == 1
+    assert "row 0" in capsys.readouterr().err
+
+
+def test_batch_settle_generated_ledger(tmp_path, capsys):
+    from benchmarks.generate import write_ledger
+
+    write_ledger(str(tmp_path), participants=20, payments=200, seed=1)
+
+    assert main(["settle", "--names", str(tmp_path / "names.txt"), "--payments", str(tmp_path / "payments.json")]) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert len(result["net_balances"]) == 20
+    assert sum(result["net_balances"].values()) == pytest.approx(0, abs=1e-6)
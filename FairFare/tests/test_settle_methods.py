@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from FairFare.utils.mappings import SETTLEMENT_METHODS_MAPPING
+
+
+def random_balances(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    cents = [rng.randint(-10_000, 10_000) for _ in range(n - 1)]
+    cents.append(-sum(cents))
+    return {f"p{i}": c / 100 for i, c in enumerate(cents)}
+
+
+def apply_settlements(balances, settlements):
+    remaining = {pid: round(bal * 100) for pid, bal in balances.items()}
+    for tx in settlements:
+        assert tx["amount"] > 0
+        remaining[tx["from"]] += round(tx["amount"] * 100)
+        remaining[tx["to"]] -= round(tx["amount"] * 100)
+    return remaining
+
+
+@pytest.mark.parametrize("method", ["heap_greedy", "optimal"])
+@pytest.mark.parametrize("n", [2, 10, 500])
+def test_settlement_clears_balances(method: str, n: int):
+    balances = random_balances(n)
+    settlements = SETTLEMENT_METHODS_MAPPING[method](balances)
+    assert len(settlements) <= n - 1
+    assert all(cents == 0 for cents in apply_settlements(balances, settlements).values())
+
+
+def test_heap_greedy_absorbs_float_leftovers():
+    # a three-way split of 100 leaves balances that are not whole cents
+    balances = {"a": 200 / 3, "b": -100 / 3, "c": -100 / 3}
+    settlements = SETTLEMENT_METHODS_MAPPING["heap_greedy"](balances)
+    assert len(settlements) == 2
+    assert sum(tx["amount"] for tx in settlements) == pytest.approx(66.67)
+
+
+def test_heap_greedy_rejects_unbalanced():
+    with pytest.raises(ValueError):
+        SETTLEMENT_METHODS_MAPPING["heap_greedy"]({"a": 1.0, "b": -0.5})
+
+
+def test_optimal_finds_zero_sum_groups():
+    # {a, c} and {b, d, e} settle independently: 3 transactions instead of greedy's 4
+    balances = {"a": 5.0, "b": 7.0, "c": -5.0, "d": -3.0, "e": -4.0}
+    assert len(SETTLEMENT_METHODS_MAPPING["greedy"](balances)) == 4
+    settlements = SETTLEMENT_METHODS_MAPPING["optimal"](balances)
+    assert len(settlements) == 3
+    assert all(cents == 0 for cents in apply_settlements(balances, settlements).values())
+
+    balances = {"a": 6.0, "b": 4.0, "c": -3.0, "d": -3.0, "e": -2.0, "f": -2.0}
+    assert len(SETTLEMENT_METHODS_MAPPING["optimal"](balances)) == 4
+
+
+@pytest.mark.parametrize("options", [{"max_participants": 4}, {"time_budget": 0}])
+def test_optimal_falls_back_to_greedy(options):
+    balances = random_balances(12)
+    settlements = SETTLEMENT_METHODS_MAPPING["optimal"](balances, **options)
+    assert settlements == SETTLEMENT_METHODS_MAPPING["heap_greedy"](balances)
+
+
+def test_graph_only_pays_co_participants():
+    # a shared with b, b with c, and c with d; a and d never shared a payment
+    groups = [("a", "b"), ("b", "c"), ("c", "d")]
+    balances = {"a": -10.0, "b": 0.0, "c": 0.0, "d": 10.0}
+    settlements = SETTLEMENT_METHODS_MAPPING["graph"](balances, groups=groups)
+    edges = {frozenset(group) for group in groups}
+    assert all(frozenset((tx["from"], tx["to"])) in edges for tx in settlements)
+    assert all(cents == 0 for cents in apply_settlements(balances, settlements).values())
+
+    # without groups everyone is connected
+    assert len(SETTLEMENT_METHODS_MAPPING["graph"](balances)) == 1
+
+
+def test_graph_pays_direct_creditors_before_relaying():
+    groups = [("r", "a", "c"), ("a", "c"), ("r", "x"), ("r", "y"), ("r", "z")]
+    balances = {"r": 1.0, "a": -10.0, "c": 9.0, "x": 0.0, "y": 0.0, "z": 0.0}
+    settlements = SETTLEMENT_METHODS_MAPPING["graph"](balances, groups=groups)
+    assert sorted((tx["from"], tx["to"], tx["amount"]) for tx in settlements) == [("a", "c", 9.0), ("a", "r", 1.0)]
+
+    # a zero-balance participant only relays money between people who never shared a payment
+    groups = [("a", "b", "c"), ("b", "d"), ("b", "e")]
+    balances = {"a": -5.0, "b": 0.0, "c": 2.0, "d": 3.0, "e": 0.0}
+    settlements = SETTLEMENT_METHODS_MAPPING["graph"](balances, groups=groups)
+    assert sorted((tx["from"], tx["to"], tx["amount"]) for tx in settlements) == [
+        ("a", "b", 3.0),
+        ("a", "c", 2.0),
+        ("b", "d", 3.0),
+    ]
+    assert all(cents == 0 for cents in apply_settlements(balances, settlements).values())
+
+
+def test_graph_settles_large_sparse_groups():
+    rng = random.Random(0)
+    n = 10_000
+    groups = [tuple(rng.sample(range(n), rng.randint(2, 5))) for _ in range(40_000)]
+    cents = {pid: 0 for pid in range(n)}
+    for group in groups:
+        amount = rng.randint(1, 10_000)
+        cents[group[0]] += amount * (len(group) - 1)
+        for pid in group[1:]:
+            cents[pid] -= amount
+    balances = {pid: c / 100 for pid, c in cents.items()}
+
+    settlements = SETTLEMENT_METHODS_MAPPING["graph"](balances, groups=groups)
+    assert len(settlements) <= n - 1
+    assert all(cents == 0 for cents in apply_settlements(balances, settlements).values())
+
+
+def test_graph_rejects_disconnected_imbalance():
+    with pytest.raises(ValueError):
+        SETTLEMENT_METHODS_MAPPING["graph"]({"a": 5.0, "b": -5.0}, groups=[("a",), ("b",)])
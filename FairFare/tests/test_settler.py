@@ -1,10 +1,12 @@
+import itertools
 import json
+import random
 from pathlib import Path
 
 import pytest
 
 from FairFare.core import Payment, Person
-from FairFare.settler import ExpenseManager
+from FairFare.settler import ExpenseManager, settle_across, settle_many
 
 TEST_CASES = ["test_case_1", "test_case_2"]
 
@@ -41,8 +43,9 @@ def load_test_data(path: str):
     return participant_list, payment_list, expected_net, expected_transactions
 
 
+@pytest.mark.parametrize("columnar", [False, True])
 @pytest.mark.parametrize("path", TEST_CASES)
-def test_settlement_scenario(path: str):
+def test_settlement_scenario(path: str, columnar: bool):
     (
         participant_list,
         payment_list,
@@ -51,7 +54,7 @@ def test_settlement_scenario(path: str):
     ) = load_test_data(path)
 
     # Initialize ExpenseManager with names from file
-    em = ExpenseManager(participant_list, payment_list)
+    em = ExpenseManager(participant_list, payment_list, columnar=columnar)
 
     # Run settlement
     net_balances = em.get_net_balances()
@@ -77,3 +80,224 @@ def test_settlement_scenario(path: str):
 
     for actual, expected in zip(sorted_transactions, sorted_expected):
         assert actual == expected, f"Transaction mismatch: expected {expected}, got {actual}"
+
+
+def test_columnar_matches_rowwise():
+    rng = random.Random(0)
+    participant_list = [Person(f"P{i}", f"P{i}") for i in range(20)]
+    ids = [p.id for p in participant_list]
+    payment_list = []
+    for _ in range(200):
+        payers = rng.sample(ids, rng.randint(1, 3))
+        sharees = rng.sample(ids, rng.randint(1, 8))
+        payment_list.append(
+            Payment(
+                participant_contributions={pid: round(rng.uniform(1, 100), 2) for pid in payers},
+                input_participant_shares={pid: 0 for pid in sharees},
+            )
+        )
+
+    rowwise = ExpenseManager(participant_list, payment_list[:150])
+    columnar = ExpenseManager(participant_list, payment_list[:150], columnar=True)
+    for manager in (rowwise, columnar):
+        manager.add_payments(payment_list[150:])
+        for payment in payment_list[:120:2]:
+            manager.remove_payment(payment.id)
+        manager.replace_payment(payment_list[1].id, payment_list[0])
+        manager.checkpoint(upto=payment_list[3].id)
+        manager.add_payment(payment_list[2])
+    assert len(columnar.ledgers[None].spans) == len(columnar.payment_list)
+    expected = rowwise.get_net_balances()
+    rowwise.balance_expenses()
+    columnar.balance_expenses()
+    assert rowwise.get_net_balances() == columnar.get_net_balances() == expected
+
+
+def test_incremental_payment_updates():
+    participant_list, payment_list, expected_net, _ = load_test_data("test_case_1")
+    em = ExpenseManager(participant_list, [])
+    for payment in payment_list:
+        em.add_payment(payment)
+    assert {pid: round(bal, 2) for pid, bal in em.get_net_balances().items()} == expected_net
+
+    edited = Payment({"Alice": 30}, {"Bob": 0, "Charlie": 0})
+    em.replace_payment(payment_list[0].id, edited)
+    em.remove_payment(payment_list[1].id)
+    incremental = em.get_net_balances()
+
+    em.balance_expenses()
+    replayed = em.get_net_balances()
+    assert [p.id for p in em.payment_list] == [p.id for p in payment_list[2:]] + [edited.id]
+    for pid in replayed:
+        assert incremental[pid] == pytest.approx(replayed[pid])
+
+    with pytest.raises(KeyError):
+        em.remove_payment(payment_list[1].id)
+    # the payments are changed through the manager only
+    with pytest.raises(AttributeError):
+        em.payment_list.append(edited)
+    with pytest.raises(KeyError):
+        em.add_payment(Payment({"Dave": 10}, {"Alice": 0}))
+
+
+def test_settlement_options_are_forwarded():
+    participant_list, payment_list, _, expected_transactions = load_test_data("test_case_1")
+    em = ExpenseManager(
+        participant_list, payment_list, settlement_method="optimal", settlement_options={"time_budget": 0.5}
+    )
+    assert len(em.settle()) == len(expected_transactions)
+
+    em.settlement_options = {"max_participants": 20, "unknown": True}
+    with pytest.raises(TypeError):
+        em.settle()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_settle_many(workers: int):
+    groups = {path: load_test_data(path)[:2] for path in TEST_CASES}
+    groups["broken"] = ([Person("Alice", "Alice")], [Payment({"Dave": 10}, {"Alice": 0})])
+
+    results = dict(settle_many(groups, workers=workers, chunk_size=1))
+    assert set(results) == set(groups)
+    assert "KeyError" in results["broken"]["error"]
+    for path in TEST_CASES:
+        _, _, expected_net, expected_transactions = load_test_data(path)
+        assert results[path]["net_balances"] == expected_net
+        assert len(results[path]["transactions"]) == len(expected_transactions)
+
+
+@pytest.mark.parametrize("fold", [False, True])
+def test_graph_settlement(fold: bool):
+    participant_list, payment_list, expected_net, _ = load_test_data("test_case_2")
+    em = ExpenseManager(participant_list, [] if fold else payment_list, settlement_method="graph")
+    if fold:
+        em.fold_payments(payment_list)
+    co_participants = {
+        frozenset(pair)
+        for payment in payment_list
+        for pair in itertools.combinations({*payment.participant_contributions, *payment.input_participant_shares}, 2)
+    }
+
+    remaining = {pid: round(balance * 100) for pid, balance in expected_net.items()}
+    for tx in em.settle():
+        assert frozenset((tx["from"], tx["to"])) in co_participants
+        remaining[tx["from"]] += round(tx["amount"] * 100)
+        remaining[tx["to"]] -= round(tx["amount"] * 100)
+    assert all(cents == 0 for cents in remaining.values())
+
+    results = dict(settle_many({"group": (participant_list, payment_list)}, workers=1, settlement_method="graph"))
+    assert (
+        results["group"]["transactions"]
+        == ExpenseManager(participant_list, payment_list, settlement_method="graph").settle()
+    )
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_multi_currency(columnar: bool):
+    participants = [Person("Alice", "a"), Person("Bob", "b"), Person("Charlie", "c")]
+    rates = {"base": "EUR", "rates": {"USD": 1.25, "JPY": 160.0}}
+    payments = [
+        Payment({"a": 30}, {"a": 0, "b": 0, "c": 0}),
+        Payment({"b": 25}, {"a": 0, "b": 0}, currency="USD"),
+        Payment({"c": 4800}, {"a": 0, "b": 0, "c": 0}, currency="JPY", minor_units=0),
+    ]
+    em = ExpenseManager(participants, payments, currency="EUR", rates=rates, columnar=columnar)
+    # 25 USD is 20 EUR and 4800 JPY is 30 EUR
+    assert em.get_net_balances() == {"a": 0.0, "b": -10.0, "c": 10.0}
+    assert em.net_balance_vector.sum() == 0
+
+    extra = Payment({"a": 1000}, {"b": 0, "c": 0, "a": 0}, currency="JPY", minor_units=0)
+    em.add_payment(extra)
+    incremental = em.get_net_balances()
+    em.balance_expenses()
+    assert em.get_net_balances() == incremental
+    assert sum(round(balance * 100) for balance in incremental.values()) == 0
+    # 1000 JPY is 6.25 EUR, split three ways
+    assert incremental["a"] == pytest.approx(6.25 * 2 / 3, abs=0.01)
+    assert sum(tx["amount"] for tx in em.settle()) == pytest.approx(incremental["a"] + incremental["c"])
+
+    em.remove_payment(extra.id)
+    assert em.get_net_balances() == {"a": 0.0, "b": -10.0, "c": 10.0}
+
+    with pytest.raises(ValueError):
+        em.add_payment(Payment({"a": 10}, {"b": 0}, currency="GBP"))
+    with pytest.raises(ValueError):
+        ExpenseManager(participants, payments)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_checkpoint(columnar: bool):
+    participant_list, payment_list, expected_net, _ = load_test_data("test_case_1")
+    em = ExpenseManager(participant_list, payment_list, columnar=columnar)
+    cutoff = len(payment_list) // 2
+
+    archived = em.checkpoint(payment_list[cutoff - 1].id)
+    assert archived == payment_list[:cutoff]
+    assert em.payment_list == tuple(payment_list[cutoff:])
+    assert em.get_net_balances() == pytest.approx(expected_net)
+
+    # later computations start from the checkpoint
+    em.balance_expenses()
+    assert em.get_net_balances() == pytest.approx(expected_net)
+    restored = ExpenseManager(
+        participant_list, payment_list[cutoff:], columnar=columnar, checkpoint=em.checkpoint_balances
+    )
+    assert restored.get_net_balances() == pytest.approx(expected_net)
+
+    em.remove_payment(payment_list[-1].id)
+    em.checkpoint()
+    assert em.payment_list == ()
+    em.balance_expenses()
+    assert em.get_net_balances() == pytest.approx(
+        ExpenseManager(participant_list, payment_list[:-1]).get_net_balances()
+    )
+
+
+@pytest.mark.parametrize("settlement_method", ["greedy", "graph"])
+def test_settle_across(settlement_method: str):
+    # Alice and Bob share a trip and a flat, under different ids in each group
+    trip = [Person("Alice", "a1"), Person("Bob", "b1"), Person("Carol", "c1")]
+    flat = [Person("Alice", "a2"), Person("Bob", "b2")]
+    trip_manager = ExpenseManager(trip, [Payment({"a1": 30}, {"a1": 0, "b1": 0, "c1": 0})])
+    flat_manager = ExpenseManager(flat, [Payment({"b2": 16}, {"a2": 0, "b2": 0})])
+    assert len(trip_manager.settle()) + len(flat_manager.settle()) == 3
+
+    identity = {"a1": "alice", "a2": "alice", "b1": "bob", "b2": "bob"}
+    result = settle_across({"trip": trip_manager, "flat": flat_manager}, identity, settlement_method=settlement_method)
+    assert result["net_balances"] == {"alice": 12.0, "bob": -2.0, "c1": -10.0}
+    assert sorted((tx["from"], tx["to"], tx["amount"]) for tx in result["transactions"]) == [
+        ("bob", "alice", 2.0),
+        ("c1", "alice", 10.0),
+    ]
+
+    by_name = settle_across([trip_manager, flat_manager], lambda person: person.name)
+    assert by_name["net_balances"] == {"Alice": 12.0, "Bob": -2.0, "Carol": -10.0}
+    with pytest.raises(ValueError):
+        settle_across([trip_manager, ExpenseManager(flat, [], minor_units=0)])
+
+
+@pytest.mark.parametrize("settlement_method", ["greedy", "graph"])
+def test_preview_matches_adding_each_payment(settlement_method: str):
+    participants = [Person("Alice", "a"), Person("Bob", "b"), Person("Charlie", "c")]
+    rates = {"base": "EUR", "rates": {"JPY": 160.0}}
+    payments = [
+        Payment({"a": 30}, {"a": 0, "b": 0, "c": 0}),
+        Payment({"c": 800}, {"a": 0, "c": 0}, currency="JPY", minor_units=0),
+    ]
+    em = ExpenseManager(participants, payments, settlement_method, currency="EUR", rates=rates)
+    before = em.get_net_balances()
+    candidates = [
+        Payment({"b": 12.5}, {"a": 0.5, "b": 0.5}, "ratio"),
+        Payment({"a": 1000}, {"b": 0, "c": 0}, currency="JPY", minor_units=0),
+        Payment({"c": 7}, {"a": 0, "b": 0, "c": 0}),
+    ]
+
+    previews = em.preview(candidates)
+    assert em.get_net_balances() == before and len(em.payment_list) == 2
+    for candidate, preview in zip(candidates, previews):
+        em.add_payment(candidate)
+        assert preview == {"net_balances": em.get_net_balances(), "transactions": em.settle()}
+        em.remove_payment(candidate.id)
+
+    with pytest.raises(KeyError):
+        em.preview([Payment({"d": 1}, {"a": 0})])
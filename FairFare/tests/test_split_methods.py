@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from FairFare.core import Payment
+from FairFare.utils.money import allocate
+
+
+@pytest.mark.parametrize(
+    "split_method, shares",
+    [
+        ("even", {"a": 0, "b": 0, "c": 0}),
+        ("ratio", {"a": 0.5, "b": 0.25, "c": 0.25}),
+        ("ratio", {"a": 1 / 3, "b": 1 / 3, "c": 1 / 3}),
+    ],
+)
+@pytest.mark.parametrize("total", [0.01, 100, 33.33, 1234.57])
+def test_split_shares_sum_to_total(split_method, shares, total):
+    payment = Payment({"a": total}, shares, split_method=split_method)
+    assert sum(payment.split_shares_minor.values()) == payment.total_minor
+
+
+def test_exact_split_requires_exact_total():
+    payment = Payment({"a": 10.1, "b": 0.2}, {"a": 10, "b": 0.3}, split_method="exact")
+    assert payment.split_shares_minor == {"a": 1000, "b": 30}
+    with pytest.raises(ValueError):
+        Payment({"a": 10}, {"a": 5, "b": 4.99}, split_method="exact")
+
+
+def test_minor_units_are_configurable():
+    payment = Payment({"a": 1000}, {"a": 0, "b": 0, "c": 0}, minor_units=0)
+    assert payment.split_shares_minor == {"a": 334, "b": 333, "c": 333}
+    assert payment.split_participant_shares == {"a": 334.0, "b": 333.0, "c": 333.0}
+
+
+def test_allocate_largest_remainder():
+    assert allocate(100, {"a": 1, "b": 1, "c": 1}) == {"a": 34, "b": 33, "c": 33}
+    assert allocate(10, {"a": 0.15, "b": 0.85}) == {"a": 2, "b": 8}
+
+
+def test_from_columns_matches_payment():
+    rng = random.Random(0)
+    ids = [f"p{i}" for i in range(10)]
+    columns = {"participant_contributions": [], "input_participant_shares": [], "split_method": []}
+    for _ in range(300):
+        method = rng.choice(["even", "exact", "ratio"])
+        contributions = {pid: rng.randint(0, 10_000) / 100 for pid in rng.sample(ids, rng.randint(1, 3))}
+        sharees = rng.sample(ids, rng.randint(1, 5))
+        if method == "even":
+            shares = {pid: 0 for pid in sharees}
+        elif method == "exact":
+            shares = {pid: 0 for pid in sharees}
+            shares[sharees[0]] = sum(contributions.values())
+        else:
+            shares = {pid: 1 / len(sharees) for pid in sharees}
+        columns["participant_contributions"].append(contributions)
+        columns["input_participant_shares"].append(shares)
+        columns["split_method"].append(method)
+
+    payments = Payment.from_columns(**columns)
+    assert len({payment.id for payment in payments}) == len(payments)
+    for i, payment in enumerate(payments):
+        expected = Payment(
+            columns["participant_contributions"][i],
+            columns["input_participant_shares"][i],
+            split_method=columns["split_method"][i],
+            id=payment.id,
+        )
+        assert payment == expected
+
+
+def test_from_columns_validates_batch():
+    with pytest.raises(ValueError):
+        Payment.from_columns([{"a": 10}, {"a": -1}], [{"a": 0}, {"a": 0}])
+    with pytest.raises(ValueError):
+        Payment.from_columns([{"a": 10}], [{"a": 0}], split_method=["unknown"])
+    with pytest.raises(ValueError, match="Payment 1"):
+        Payment.from_columns([{"a": 10}, {"a": 10}], [{"a": 10}, {"a": 5}], split_method="exact")
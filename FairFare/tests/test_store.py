@@ -0,0 +1,172 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from FairFare.core import Payment, Person
+from FairFare.web.rwlock import RWLock
+from FairFare.web.store import PAYMENT_BYTES, MemorySessionStore, create_store
+
+
+def test_concurrent_memo_misses_share_one_computation():
+    store = MemorySessionStore()
+    session = store.create_session("s", [Person("Alice"), Person("Bob")])
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "result"
+
+    results = []
+
+    def request():
+        barrier.wait()
+        results.append(session.memo("settle", compute))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["result"] * 8
+    assert len(calls) == 1
+
+
+def test_idle_sessions_expire():
+    store = MemorySessionStore(ttl=0.05)
+    store.create_session("old", [Person("Alice")])
+    time.sleep(0.06)
+    store.create_session("new", [Person("Bob")])
+
+    assert store.get("old") is None and store.get("new") is not None
+    assert store.evictions["ttl"] == 1
+    assert list(store.sessions) == ["new"] and not store.change_logs.keys() - {"new"}
+
+
+def test_least_recently_used_sessions_are_evicted_first():
+    store = MemorySessionStore(max_sessions=2)
+    store.create_session("a", [Person("Alice")])
+    store.create_session("b", [Person("Bob")])
+    store.get("a")
+    store.create_session("c", [Person("Carol")])
+
+    assert list(store.sessions) == ["a", "c"]
+    assert store.counters()["fairfare_sessions_evicted_max_sessions_total"][1] == 1
+
+
+def test_memory_budget_evicts_other_sessions():
+    alice, bob = Person("Alice"), Person("Bob")
+    store = MemorySessionStore(max_bytes=5 * PAYMENT_BYTES)
+    store.create_session("idle", [alice, bob])
+    store.add_payment("idle", Payment({alice.id: 10}, {alice.id: 0, bob.id: 0}, "even"))
+    store.create_session("busy", [alice, bob])
+    store.add_payments("busy", [Payment({bob.id: 4}, {alice.id: 0, bob.id: 0}, "even") for _ in range(3)])
+
+    assert list(store.sessions) == ["busy"]
+    assert store.evictions["max_bytes"] == 1
+    assert store.total_bytes() <= store.max_bytes
+
+
+def test_running_byte_total_follows_writes_and_evictions():
+    alice, bob = Person("Alice"), Person("Bob")
+    store = MemorySessionStore(max_bytes=12 * PAYMENT_BYTES)
+
+    def recount():
+        return sum(store.session_bytes(session_id) for session_id in store.sessions)
+
+    for name in "abcd":
+        store.create_session(name, [alice, bob])
+        payments = [Payment({alice.id: 10}, {alice.id: 0, bob.id: 0}, "even") for _ in range(3)]
+        store.add_payments(name, payments)
+        store.remove_payment(name, payments[0].id)
+        store.checkpoint(name)
+        assert store.total_bytes() == recount()
+    # recreating a session replaces its size
+    store.create_session("d", [alice, bob])
+    assert store.total_bytes() == recount()
+    assert store.evictions["max_bytes"] > 0 and store.sizes.keys() == store.sessions.keys()
+
+
+def test_memory_store_url_options():
+    store = create_store("memory?ttl=60&max_sessions=none")
+    assert (store.ttl, store.max_sessions, store.max_bytes) == (60.0, None, 256 * 1024 * 1024)
+    with pytest.raises(ValueError):
+        create_store("memory?size=1")
+
+
+def test_rwlock_readers_share_and_writers_exclude():
+    lock = RWLock()
+    readers = threading.Barrier(3, timeout=5)
+    events = []
+
+    def read():
+        with lock.read():
+            # all three readers hold the lock at once, and may re-enter it
+            readers.wait()
+            with lock.read():
+                events.append("read")
+
+    threads = [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert events == ["read"] * 3
+
+    def late_read():
+        with lock.read():
+            events.append("late read")
+
+    with lock.write():
+        reader = threading.Thread(target=late_read)
+        reader.start()
+        reader.join(0.05)
+        assert reader.is_alive()
+        events.append("write")
+    reader.join()
+    assert events[-2:] == ["write", "late read"]
+
+
+def test_snapshots_are_consistent_under_concurrent_writes():
+    alice, bob = Person("Alice"), Person("Bob")
+    store = MemorySessionStore()
+    session = store.create_session("s", [alice, bob])
+    stop = threading.Event()
+    errors = []
+
+    def write():
+        for _ in range(2000):
+            store.add_payment("s", Payment({alice.id: 2}, {alice.id: 0, bob.id: 0}, "even"))
+        stop.set()
+
+    def read():
+        while not stop.is_set():
+            with session.lock.read():
+                snapshot = session.snapshot()
+                balances = session.memo("balances", session.manager.get_net_balances)
+                latest = store.changes_since("s", snapshot.version - 1, snapshot.version) if snapshot.version else {}
+            # every payment moves one unit from Bob to Alice
+            if len(snapshot.payments) != snapshot.version or balances[alice.id] != len(snapshot.payments):
+                errors.append((snapshot.version, len(snapshot.payments), balances))
+            # the change of every version is logged by the time readers see the version
+            if snapshot.version and latest != {snapshot.payments[-1].id: "upsert"}:
+                errors.append((snapshot.version, latest))
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(4)]
+    # switch threads often so readers land between the steps of a write
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert not errors
+    assert len(session.snapshot().payments) == 2000
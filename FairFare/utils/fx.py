@@ -0,0 +1,92 @@
+import json
+import os
+from functools import lru_cache
+from numbers import Number
+from typing import Dict, Mapping, Optional, Union
+
+import numpy as np
+
+
+class RateTable:
+    """
+    Exchange rates quoted against one base currency: `rates[code]` units of `code` buy one unit of the base.
+    Only ratios are used, so any base works as long as every rate in the table uses the same one.
+    """
+
+    def __init__(self, rates: Mapping[str, float], base: Optional[str] = None):
+        rates = dict(rates)
+        if base is not None:
+            rates.setdefault(base, 1.0)
+        for code, rate in rates.items():
+            if not isinstance(rate, Number) or not rate > 0:
+                raise ValueError(f"Exchange rate of '{code}' should be a positive number.")
+        self.base = base
+        self.rates = rates
+        self._factors: Dict[tuple, float] = {}
+
+    @classmethod
+    def from_mapping(cls, data: Mapping) -> "RateTable":
+        """
+        Build a table from {"base": "EUR", "rates": {"USD": 1.08, ...}} or a flat {"USD": 1.08, ...}.
+        """
+        if "rates" in data:
+            return cls(data["rates"], data.get("base"))
+        return cls(data)
+
+    def has(self, code: str) -> bool:
+        return code in self.rates
+
+    def rate(self, source: str, target: str) -> float:
+        """
+        Units of `target` bought by one unit of `source`.
+        """
+        for code in (source, target):
+            if code not in self.rates:
+                raise ValueError(f"No exchange rate for currency '{code}'.")
+        return self.rates[target] / self.rates[source]
+
+    def factor(self, source: str, target: str, source_minor_units: int, target_minor_units: int) -> float:
+        """
+        Multiplier from minor units of `source` to minor units of `target`, cached per pair.
+        """
+        key = (source, target, source_minor_units, target_minor_units)
+        factor = self._factors.get(key)
+        if factor is None:
+            factor = self._factors[key] = self.rate(source, target) * 10 ** (target_minor_units - source_minor_units)
+        return factor
+
+
+@lru_cache(maxsize=16)
+def _load_rate_file(path: str, mtime: float) -> RateTable:
+    with open(path, "r") as f:
+        return RateTable.from_mapping(json.load(f))
+
+
+def load_rates(source: Union[RateTable, Mapping, str, os.PathLike]) -> RateTable:
+    """
+    Rate table from a RateTable, a mapping, or the path of a JSON file in the mapping format.
+    Files are parsed once and cached until they change on disk.
+    """
+    if isinstance(source, RateTable):
+        return source
+    if isinstance(source, Mapping):
+        return RateTable.from_mapping(source)
+    path = os.path.abspath(source)
+    return _load_rate_file(path, os.path.getmtime(path))
+
+
+def convert_minor(amounts: np.ndarray, factor: float) -> np.ndarray:
+    """
+    Convert a vector of minor-unit amounts with one multiplication, keeping its total.
+    Amounts are floored and the leftover units go to the largest remainders, so a zero-sum
+    balance vector stays exactly zero-sum in the target currency.
+    :param amounts: Integer amounts in the source minor units.
+    :param factor: Multiplier from source to target minor units.
+    :return: Integer amounts in the target minor units.
+    """
+    exact = amounts * factor
+    converted = np.floor(exact)
+    leftover = int(round(exact.sum())) - int(converted.sum())
+    if leftover > 0:
+        converted[np.argsort(converted - exact, kind="stable")[:leftover]] += 1
+    return converted.astype(np.int64)
@@ -1,4 +1,9 @@
-from FairFare.utils.settle_methods import greedy_settlement
+from FairFare.utils.settle_methods import (
+    graph_settlement,
+    greedy_settlement,
+    heap_greedy_settlement,
+    optimal_settlement,
+)
 from FairFare.utils.split_methods import even_split, exact_split, ratio_split
 
 SPLIT_METHODS_MAPPING = {
@@ -8,4 +13,12 @@ SPLIT_METHODS_MAPPING = {
 }
 
 
-SETTLEMENT_METHODS_MAPPING = {"greedy": greedy_settlement}
+SETTLEMENT_METHODS_MAPPING = {
+    "greedy": greedy_settlement,
+    "heap_greedy": heap_greedy_settlement,
+    "optimal": optimal_settlement,
+    "graph": graph_settlement,
+}
+
+# settlement methods that take the participants of every payment as `groups`
+GROUP_SETTLEMENT_METHODS = {"graph"}
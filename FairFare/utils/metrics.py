@@ -0,0 +1,139 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# upper bounds in seconds, from 10µs batch stages up to multi-second settlements
+BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_enabled = os.environ.get("FAIRFARE_METRICS", "1").lower() not in ("0", "false", "off")
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(flag: bool):
+    """
+    Switch timing on or off at runtime; the default comes from FAIRFARE_METRICS.
+    """
+    global _enabled
+    _enabled = flag
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets, in the cumulative form Prometheus expects.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total = 0
+        cumulative = []
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(
+        self,
+        gauges: Optional[Dict[str, Tuple[str, float]]] = None,
+        counters: Optional[Dict[str, Tuple[str, float]]] = None,
+    ) -> str:
+        """
+        Prometheus text exposition of every stage histogram followed by `gauges` and `counters`.
+        :param gauges: Mapping from metric name to (help text, value).
+        :param counters: Mapping from metric name to (help text, value) of monotonic totals.
+        :return: The exposition text.
+        """
+        lines = [
+            "# HELP fairfare_stage_seconds Latency of instrumented stages.",
+            "# TYPE fairfare_stage_seconds histogram",
+        ]
+        with self.lock:
+            snapshot = [
+                (stage, histogram.buckets, histogram.cumulative(), histogram.sum, histogram.count)
+                for stage, histogram in sorted(self.histograms.items())
+            ]
+        for stage, buckets, cumulative, total, count in snapshot:
+            for bound, value in zip((*map(repr, buckets), "+Inf"), cumulative):
+                lines.append(f'fairfare_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {value}')
+            lines.append(f'fairfare_stage_seconds_sum{{stage="{stage}"}} {total!r}')
+            lines.append(f'fairfare_stage_seconds_count{{stage="{stage}"}} {count}')
+        for kind, values in (("gauge", gauges), ("counter", counters)):
+            for name, (description, value) in (values or {}).items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def observe(stage: str, seconds: float):
+    REGISTRY.observe(stage, seconds)
+
+
+def timed(stage: str) -> Callable:
+    """
+    Decorator recording the latency of every call under `stage`.
+    Costs a single flag check per call while metrics are switched off.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                REGISTRY.observe(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def timer(stage: str) -> Iterator[None]:
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(stage, time.perf_counter() - start)
@@ -0,0 +1,67 @@
+import math
+from typing import Dict
+
+# Amount in integer minor units (e.g. cents), so sums and comparisons are exact
+Money = int
+
+MINOR_UNITS = 2
+
+
+def to_minor(amount: float, minor_units: int = MINOR_UNITS) -> Money:
+    """
+    Convert a major-unit amount (e.g. 12.34) to integer minor units (e.g. 1234).
+    """
+    return round(amount * 10**minor_units)
+
+
+def to_major(amount: Money, minor_units: int = MINOR_UNITS) -> float:
+    """
+    Convert integer minor units back to a major-unit amount.
+    """
+    return amount / 10**minor_units
+
+
+def allocate(total: Money, weights: Dict[str, float]) -> Dict[str, Money]:
+    """
+    Split `total` proportionally to `weights` with largest-remainder allocation.
+    Every share is floored and the leftover minor units go to the largest remainders,
+    so the shares always sum exactly to `total`.
+    :param total: Amount in minor units to be allocated.
+    :param weights: Mapping from participant id to non-negative weight.
+    :return: Mapping from participant id to allocated minor units.
+    """
+    weight_sum = sum(weights.values())
+    if weight_sum <= 0:
+        raise ValueError("Allocation weights must sum to a positive value.")
+
+    exact = {pid: total * weight / weight_sum for pid, weight in weights.items()}
+    shares = {pid: math.floor(value) for pid, value in exact.items()}
+    leftover = total - sum(shares.values())
+    by_remainder = sorted(shares, key=lambda pid: exact[pid] - shares[pid], reverse=True)
+    for pid in by_remainder[:leftover]:
+        shares[pid] += 1
+    return shares
+
+
+def balances_to_minor(balances: Dict[str, float], minor_units: int = MINOR_UNITS) -> Dict[str, Money]:
+    """
+    Convert major-unit `balances` to minor units that sum exactly to zero.
+    The rounding residual is pushed onto the entries that were rounded the furthest.
+    """
+    total_balance = sum(balances.values())
+    # Check if the total balance is zero (to within half a minor unit)
+    if abs(total_balance) * 10**minor_units >= 0.5:
+        raise ValueError(
+            f"Invalid balances: total net balance is {total_balance}, \
+                must be zero"
+        )
+
+    exact = {pid: bal * 10**minor_units for pid, bal in balances.items()}
+    minor = {pid: round(value) for pid, value in exact.items()}
+    residual = sum(minor.values())
+    if residual:
+        step = -1 if residual > 0 else 1
+        furthest = sorted(minor, key=lambda pid: (minor[pid] - exact[pid]) * step)
+        for pid in furthest[: abs(residual)]:
+            minor[pid] += step
+    return minor
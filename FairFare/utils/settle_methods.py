@@ -1,22 +1,29 @@
-from typing import Dict, List, Union
+import heapq
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Collection, Dict, Iterable, List, Optional, Tuple, Union
 
+import numpy as np
 
-def greedy_settlement(balances: Dict[str, float]) -> List[Dict[str, Union[str, float]]]:
+from FairFare.utils.metrics import timed
+from FairFare.utils.money import MINOR_UNITS, Money, balances_to_minor, to_major
+
+logger = logging.getLogger(__name__)
+
+
+@timed("settle.greedy")
+def greedy_settlement(balances: Dict[str, float], minor_units: int = MINOR_UNITS) -> List[Dict[str, Union[str, float]]]:
     """
     Compute minimum list of settlements transaction using greedy algorithm.
+    Amounts are matched in integer minor units, so no float leftovers remain.
     Each settlement is a dict with keys "from", "to", and "amount".
     """
-    total_balance = sum(bal for bal in balances.values())
-    # Check if the total balance is zero
-    if abs(total_balance) > 1e-9:
-        raise ValueError(
-            f"Invalid balances: total net balance is {total_balance}, \
-                must be zero"
-        )
+    minor = balances_to_minor(balances, minor_units)
 
     # prepare lists
-    positives = [(id, bal) for id, bal in balances.items() if bal > 0]
-    negatives = [(id, -bal) for id, bal in balances.items() if bal < 0]
+    positives = [(id, bal) for id, bal in minor.items() if bal > 0]
+    negatives = [(id, -bal) for id, bal in minor.items() if bal < 0]
     positives.sort(key=lambda x: x[1])
     negatives.sort(key=lambda x: x[1])
 
@@ -26,7 +33,7 @@ def greedy_settlement(balances: Dict[str, float]) -> List[Dict[str, Union[str, f
         debtor_id, debt = negatives[i]
         creditor_id, credit = positives[j]
         amount = min(debt, credit)
-        settlements.append({"from": debtor_id, "to": creditor_id, "amount": round(amount, 2)})
+        settlements.append({"from": debtor_id, "to": creditor_id, "amount": to_major(amount, minor_units)})
         debt -= amount
         credit -= amount
         if debt == 0:
@@ -38,3 +45,275 @@ def greedy_settlement(balances: Dict[str, float]) -> List[Dict[str, Union[str, f
         else:
             positives[j] = (creditor_id, credit)
     return settlements
+
+
+@timed("settle.heap_greedy")
+def heap_greedy_settlement(
+    balances: Dict[str, float], minor_units: int = MINOR_UNITS
+) -> List[Dict[str, Union[str, float]]]:
+    """
+    Compute settlements by repeatedly matching the largest debtor with the largest creditor.
+    Amounts are handled in integer minor units with two max-heaps, so each step closes at
+    least one participant without float leftovers and the whole run is O(n log n).
+    Each settlement is a dict with keys "from", "to", and "amount".
+    """
+    return _heap_settle(balances_to_minor(balances, minor_units), minor_units)
+
+
+def _heap_settle(minor: Dict[str, Money], minor_units: int) -> List[Dict[str, Union[str, float]]]:
+    # max-heaps keyed on the outstanding amount in minor units
+    debtors = []
+    creditors = []
+    for pid, amount in minor.items():
+        if amount < 0:
+            debtors.append((amount, pid))
+        elif amount > 0:
+            creditors.append((-amount, pid))
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+
+    settlements: List[Dict[str, Union[str, float]]] = []
+    while debtors and creditors:
+        debt, debtor_id = heapq.heappop(debtors)
+        credit, creditor_id = heapq.heappop(creditors)
+        amount = min(-debt, -credit)
+        settlements.append({"from": debtor_id, "to": creditor_id, "amount": to_major(amount, minor_units)})
+        if debt + amount:
+            heapq.heappush(debtors, (debt + amount, debtor_id))
+        if credit + amount:
+            heapq.heappush(creditors, (credit + amount, creditor_id))
+    return settlements
+
+
+@timed("settle.optimal")
+def optimal_settlement(
+    balances: Dict[str, float],
+    minor_units: int = MINOR_UNITS,
+    max_participants: int = 20,
+    time_budget: float = 1.0,
+) -> List[Dict[str, Union[str, float]]]:
+    """
+    Compute the minimum number of settlement transactions.
+    Exactly matching debtor/creditor pairs are cancelled first. The rest is split into the
+    largest number of disjoint zero-sum groups with a bitmask DP, and each group is settled
+    independently (a group of k participants needs k - 1 transactions).
+    Falls back to the heap greedy result when more than `max_participants` remain after
+    pair cancellation or the DP runs longer than `time_budget` seconds.
+    Each settlement is a dict with keys "from", "to", and "amount".
+    """
+    deadline = time.perf_counter() + time_budget
+    minor = balances_to_minor(balances, minor_units)
+    settlements: List[Dict[str, Union[str, float]]] = []
+
+    # cancel exactly matching debtor/creditor pairs
+    creditors_by_amount = defaultdict(list)
+    for pid, amount in minor.items():
+        if amount > 0:
+            creditors_by_amount[amount].append(pid)
+    for pid, amount in minor.items():
+        if amount < 0 and creditors_by_amount[-amount]:
+            creditor_id = creditors_by_amount[-amount].pop(0)
+            settlements.append({"from": pid, "to": creditor_id, "amount": to_major(-amount, minor_units)})
+            minor[pid] = minor[creditor_id] = 0
+
+    remaining = {pid: amount for pid, amount in minor.items() if amount}
+    if len(remaining) > max_participants:
+        logger.debug("%d participants left after pair cancellation, using heap greedy", len(remaining))
+        return settlements + _heap_settle(remaining, minor_units)
+
+    ids = list(remaining)
+    groups = _zero_sum_groups([remaining[pid] for pid in ids], deadline)
+    if groups is None:
+        logger.info("Zero-sum grouping exceeded its %.2fs budget, using heap greedy", time_budget)
+        return settlements + _heap_settle(remaining, minor_units)
+
+    for group in groups:
+        settlements.extend(_heap_settle({ids[i]: remaining[ids[i]] for i in group}, minor_units))
+    return settlements
+
+
+def _zero_sum_groups(amounts: List[int], deadline: float) -> Optional[List[List[int]]]:
+    """
+    Partition the indices of `amounts` into the largest number of zero-sum groups.
+    dp[mask] is the most zero-sum groups the subset `mask` can be split into; masks are
+    filled one popcount layer at a time so each layer is a handful of vectorized steps.
+    Returns None if `deadline` passes before the table is complete.
+    """
+    n = len(amounts)
+    if n == 0:
+        return []
+    masks = np.arange(1 << n, dtype=np.int64)
+    sums = np.zeros(1 << n, dtype=np.int64)
+    popcount = np.zeros(1 << n, dtype=np.int64)
+    for i, amount in enumerate(amounts):
+        bit = (masks >> i) & 1
+        sums += amount * bit
+        popcount += bit
+    zero = (sums == 0).astype(np.int64)
+
+    dp = np.zeros(1 << n, dtype=np.int64)
+    order = np.argsort(popcount, kind="stable")
+    bounds = np.searchsorted(popcount[order], np.arange(n + 2))
+    for k in range(1, n + 1):
+        if time.perf_counter() > deadline:
+            return None
+        layer = order[bounds[k] : bounds[k + 1]]
+        best = np.zeros(len(layer), dtype=np.int64)
+        for i in range(n):
+            has_bit = (layer >> i) & 1 == 1
+            best[has_bit] = np.maximum(best[has_bit], dp[layer[has_bit] ^ (1 << i)])
+        dp[layer] = best + zero[layer]
+
+    # walk back from the full set; every zero-sum mask on the path closes a group
+    groups: List[List[int]] = []
+    group: List[int] = []
+    mask = (1 << n) - 1
+    while mask:
+        target = dp[mask] - zero[mask]
+        i = next(i for i in range(n) if (mask >> i) & 1 and dp[mask ^ (1 << i)] == target)
+        group.append(i)
+        mask ^= 1 << i
+        if zero[mask]:
+            groups.append(group)
+            group = []
+    return groups
+
+
+@timed("settle.graph")
+def graph_settlement(
+    balances: Dict[str, float],
+    minor_units: int = MINOR_UNITS,
+    groups: Optional[Iterable[Collection[str]]] = None,
+) -> List[Dict[str, Union[str, float]]]:
+    """
+    Compute settlements in which participants only pay people they shared a payment with.
+    `groups` lists the participants of every payment; everyone in a group is connected to
+    everyone else in it, which makes up the co-participation graph. Debtors first pay creditors
+    they share a group with directly, so nobody relays money that could be paid straight to its
+    recipient. What is left is routed over a spanning tree of each connected component that
+    contains those direct transfers, grown breadth-first from its best-connected participant:
+    the flow on every tree edge is the residual balance of the subtree below it. All transfers
+    lie on the tree, so a component of k participants needs at most k - 1 of them, but the
+    result is not guaranteed to use the fewest transfers.
+    Runs in O(participants + entries) without materializing the pairwise edges.
+    Without `groups` everyone is assumed to be connected and the heap greedy result is returned.
+    Each settlement is a dict with keys "from", "to", and "amount".
+    """
+    minor = balances_to_minor(balances, minor_units)
+    if groups is None:
+        return _heap_settle(minor, minor_units)
+
+    groups = [tuple(group) for group in groups]
+    memberships = defaultdict(list)
+    for group_index, group in enumerate(groups):
+        for pid in group:
+            memberships[pid].append(group_index)
+
+    # net transfer per (debtor, creditor) pair, in order of first transfer
+    flows: Dict[Tuple[str, str], Money] = {}
+    residual = dict(minor)
+    # direct transfers are kept to a forest, which the spanning tree below extends
+    direct = defaultdict(list)
+    component: Dict[str, str] = {}
+
+    def find(pid: str) -> str:
+        while pid in component:
+            # path halving
+            if component[pid] in component:
+                component[pid] = component[component[pid]]
+            pid = component[pid]
+        return pid
+
+    for group in groups:
+        debtors = [pid for pid in group if residual.get(pid, 0) < 0]
+        creditors = [pid for pid in group if residual.get(pid, 0) > 0]
+        i, j = 0, 0
+        while i < len(debtors) and j < len(creditors):
+            debtor, creditor = debtors[i], creditors[j]
+            a, b = find(debtor), find(creditor)
+            if a == b:
+                # already connected through earlier direct transfers
+                j += 1
+                continue
+            component[a] = b
+            direct[debtor].append(creditor)
+            direct[creditor].append(debtor)
+            amount = min(-residual[debtor], residual[creditor])
+            _add_flow(flows, debtor, creditor, amount)
+            residual[debtor] += amount
+            residual[creditor] -= amount
+            if residual[debtor] == 0:
+                i += 1
+            if residual[creditor] == 0:
+                j += 1
+
+    # grow each tree from the participant with the most co-participants, to keep routes short
+    degree = {pid: sum(len(groups[g]) for g in group_indices) for pid, group_indices in memberships.items()}
+    roots = sorted((pid for pid, amount in residual.items() if amount), key=lambda pid: -degree.get(pid, 0))
+
+    parent: Dict[str, Optional[str]] = {}
+    visit_order = []
+    expanded = [False] * len(groups)
+
+    def reach(pid: str, up: Optional[str]):
+        # a reached participant brings along its whole direct-transfer tree, so the spanning tree contains it
+        parent[pid] = up
+        queue.append(pid)
+        stack = [pid]
+        while stack:
+            node = stack.pop()
+            for other in direct.get(node, ()):
+                if other not in parent:
+                    parent[other] = node
+                    queue.append(other)
+                    stack.append(other)
+
+    for root in roots:
+        if root in parent:
+            continue
+        queue = deque()
+        reach(root, None)
+        while queue:
+            pid = queue.popleft()
+            visit_order.append(pid)
+            for group_index in memberships.get(pid, ()):
+                # every member of a group is reached through its first expansion
+                if expanded[group_index]:
+                    continue
+                expanded[group_index] = True
+                for other in groups[group_index]:
+                    if other not in parent:
+                        reach(other, pid)
+
+    # push residual subtree balances towards the roots, leaves first
+    subtree = defaultdict(int, residual)
+    for pid in reversed(visit_order):
+        amount = subtree[pid]
+        up = parent[pid]
+        if up is None:
+            if amount:
+                raise ValueError(
+                    f"Participants connected to '{pid}' have a net balance of {to_major(amount, minor_units)} "
+                    "and cannot be settled among themselves."
+                )
+        elif amount < 0:
+            _add_flow(flows, pid, up, -amount)
+        elif amount > 0:
+            _add_flow(flows, up, pid, amount)
+        if up is not None:
+            subtree[up] += amount
+    return [
+        {"from": debtor, "to": creditor, "amount": to_major(amount, minor_units)}
+        for (debtor, creditor), amount in flows.items()
+        if amount
+    ]
+
+
+def _add_flow(flows: Dict[Tuple[str, str], Money], debtor: str, creditor: str, amount: Money):
+    # a transfer against an earlier one between the same pair nets it out
+    back = flows.get((creditor, debtor), 0)
+    if back:
+        flows[(creditor, debtor)] = back - min(back, amount)
+        amount -= min(back, amount)
+    if amount:
+        flows[(debtor, creditor)] = flows.get((debtor, creditor), 0) + amount
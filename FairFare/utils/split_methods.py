@@ -1,41 +1,53 @@
 from typing import Dict
 
+from FairFare.utils.money import MINOR_UNITS, Money, allocate, to_minor
 
-def even_split(total: float, input_participant_shares: Dict[str, float]) -> Dict[str, float]:
+
+def even_split(
+    total: Money, input_participant_shares: Dict[str, float], minor_units: int = MINOR_UNITS
+) -> Dict[str, Money]:
     """
     Evenly split `total` among `participants`.
-    :param total: Total amount to be split.
+    Leftover minor units go one each to the first participants.
+    :param total: Total amount to be split, in minor units.
     :param input_participant_shares: Mapping from participant id to share.
-    :return: Mapping from participant id to owed share amounts.
+    :param minor_units: Number of minor-unit digits of the currency.
+    :return: Mapping from participant id to owed share amounts, in minor units.
     """
-    per_head = total / len(input_participant_shares)
-    return {pid: per_head for pid in input_participant_shares.keys()}
+    per_head, leftover = divmod(total, len(input_participant_shares))
+    return {pid: per_head + (i < leftover) for i, pid in enumerate(input_participant_shares.keys())}
 
 
-def exact_split(total: float, input_participant_shares: Dict[str, float]) -> Dict[str, float]:
+def exact_split(
+    total: Money, input_participant_shares: Dict[str, float], minor_units: int = MINOR_UNITS
+) -> Dict[str, Money]:
     """
     Split `total` according to shares provided in `input_participant_shares`.
-    :param total: Total amount to be split.
+    :param total: Total amount to be split, in minor units.
     :param input_participant_shares: Mapping participant id to their share.
-    :return: Mapping from participant id to owed share amounts.
+    :param minor_units: Number of minor-unit digits of the currency.
+    :return: Mapping from participant id to owed share amounts, in minor units.
     """
-    print(total, input_participant_shares, sum(input_participant_shares.values()))
-
     if not all(share is not None for share in input_participant_shares.values()):
         raise ValueError("Exact shares must be provided for all participants.")
 
-    if abs(sum(input_participant_shares.values()) - total) > 1e-9:
+    shares = {pid: to_minor(share, minor_units) for pid, share in input_participant_shares.items()}
+    if sum(shares.values()) != total:
         raise ValueError("Exact shares must sum to the total payment amount.")
 
-    return input_participant_shares
+    return shares
 
 
-def ratio_split(total: float, input_participant_shares: Dict[str, float]) -> Dict[str, float]:
+def ratio_split(
+    total: Money, input_participant_shares: Dict[str, float], minor_units: int = MINOR_UNITS
+) -> Dict[str, Money]:
     """
     Split `total` according to the ratio in `input_participant_shares`.
-    :param total: Total amount to be split.
+    Shares are allocated by largest remainder, so they sum exactly to `total`.
+    :param total: Total amount to be split, in minor units.
     :param input_participant_shares: Mapping from participant id to ratio.
-    :return: Mapping from participant id to owed share amounts.
+    :param minor_units: Number of minor-unit digits of the currency.
+    :return: Mapping from participant id to owed share amounts, in minor units.
     """
     if not all(0 <= share <= 1 for share in input_participant_shares.values()):
         raise ValueError("Share ratios must be between 0 and 1 (inclusive).")
@@ -43,4 +55,4 @@ def ratio_split(total: float, input_participant_shares: Dict[str, float]) -> Dic
     if abs(sum(input_participant_shares.values()) - 1.0) > 1e-9:
         raise ValueError("Total ratio must equal 1.")
 
-    return {pid: total * share for pid, share in input_participant_shares.items()}
+    return allocate(total, input_participant_shares)
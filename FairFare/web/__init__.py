@@ -1,9 +1,22 @@
+import os
+
 from flask import Flask
 
+from .events import EventHub
+from .store import SessionStore, create_store
+
 
-def create_app():
+def create_app(store: SessionStore = None):
     app = Flask(__name__)
 
+    # Session storage shared by the /api/* handlers ("memory" or "sqlite:///<path>")
+    app.config["SESSION_STORE"] = store or create_store(os.environ.get("FAIRFARE_SESSION_STORE", "memory"))
+    # fan-out of ledger updates to the /api/events streams of this process
+    app.config["EVENT_HUB"] = EventHub()
+    # every open stream holds a worker thread, so clients only subscribe on threaded or async servers
+    # that enable them; otherwise they poll /api/changes
+    app.config["EVENT_STREAMS"] = os.environ.get("FAIRFARE_EVENT_STREAMS", "0") == "1"
+
     # Register routes from routes.py
     from .routes import register_routes
 
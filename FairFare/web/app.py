@@ -1,6 +1,13 @@
+import logging
+import os
+
 from FairFare.web import create_app
 
+logging.basicConfig(level=os.environ.get("FAIRFARE_LOG_LEVEL", "INFO"))
+
 app = create_app()
 
 if __name__ == "__main__":
+    # the development server is threaded, so event streams do not block other requests
+    app.config["EVENT_STREAMS"] = True
     app.run(debug=True)
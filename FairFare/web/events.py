@@ -0,0 +1,88 @@
+import queue
+import threading
+from typing import Callable, Dict, Optional, Set, Tuple
+
+# events buffered per subscriber before a slow client is dropped (it reconnects and catches up)
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+class Subscription:
+    def __init__(self, session_id: str, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.session_id = session_id
+        self.queue: "queue.Queue[str]" = queue.Queue(queue_size)
+        # set when the subscriber fell too far behind and its stream should end
+        self.dropped = False
+
+    def get(self, timeout: float) -> Optional[str]:
+        """
+        Next event, or None after `timeout` seconds without one.
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class _Topic:
+    def __init__(self, version: Optional[int]):
+        self.lock = threading.Lock()
+        self.subscribers: Set[Subscription] = set()
+        # last version fanned out to the subscribers
+        self.version = version
+
+
+class EventHub:
+    """
+    Per-process fan-out of ledger updates to the event-stream subscribers of each session.
+    An update is built once per published version and the same serialized event is queued
+    for every subscriber; sessions without subscribers cost nothing.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._topics: Dict[str, _Topic] = {}
+
+    def subscribe(self, session_id: str, version: int) -> Subscription:
+        """
+        Subscribe to the updates of a session after `version`.
+        """
+        subscription = Subscription(session_id, self.queue_size)
+        with self._lock:
+            topic = self._topics.setdefault(session_id, _Topic(version))
+            topic.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            topic = self._topics.get(subscription.session_id)
+            if topic is None:
+                return
+            topic.subscribers.discard(subscription)
+            if not topic.subscribers:
+                del self._topics[subscription.session_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(topic.subscribers) for topic in self._topics.values())
+
+    def publish(self, session_id: str, version: int, build: Callable[[Optional[int]], Tuple[int, str]]):
+        """
+        Fan out the update of a session to `version`, unless it was already published.
+        :param build: Called with the last published version; returns the version the event
+            brings subscribers to and the serialized event.
+        """
+        with self._lock:
+            topic = self._topics.get(session_id)
+        if topic is None:
+            return
+        # one publisher per session at a time, so events go out in version order
+        with topic.lock:
+            if topic.version is not None and version <= topic.version:
+                return
+            topic.version, event = build(topic.version)
+            for subscription in list(topic.subscribers):
+                try:
+                    subscription.queue.put_nowait(event)
+                except queue.Full:
+                    subscription.dropped = True
@@ -1,12 +1,311 @@
-from flask import jsonify, render_template, request
+import logging
+import secrets
+import time
+import zlib
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from FairFare.core import Payment, Person
-from FairFare.settler import ExpenseManager
+from flask import Response, current_app, g, jsonify, render_template, request
 
-sessions = {}
+from FairFare.core import Payment, Person
+from FairFare.utils import metrics
+from FairFare.web.events import EventHub
+from FairFare.web.store import LedgerSnapshot, Session, SessionStore
+
+logger = logging.getLogger(__name__)
+
+# rows serialized per chunk of a streamed response
+STREAM_BATCH = 256
+MAX_PAGE_SIZE = 10_000
+SESSION_COOKIE = "session_id"
+# seconds between keep-alive comments on an idle event stream, which is also how often a
+# worker looks for writes made by other workers of a shared store
+EVENT_HEARTBEAT = 15.0
+
+
+def parse_payment(data: Dict[str, Any], id_map: Dict[str, str]) -> Payment:
+    """
+    Build a Payment from the name-based request format of /api/add_payment.
+    """
+    contributions = {id_map[payer]: float(data["amounts"][i]) for i, payer in enumerate(data["payers"])}
+
+    shares = {id_map[sharee]: float(data["share_amounts"][i]) for i, sharee in enumerate(data["shares"])}
+
+    return Payment(
+        participant_contributions=contributions,
+        input_participant_shares=shares,
+        split_method=data["split_method"],
+        description=data["description"],
+    )
+
+
+def parse_payments(rows: List[Dict[str, Any]], id_map: Dict[str, str]) -> List[Payment]:
+    """
+    Build a batch of payments in the request format of /api/add_payment with one column-wise
+    `Payment.from_columns` call; the whole batch is rejected if any payment is invalid.
+    """
+    return Payment.from_columns(
+        [{id_map[payer]: float(data["amounts"][i]) for i, payer in enumerate(data["payers"])} for data in rows],
+        [{id_map[sharee]: float(data["share_amounts"][i]) for i, sharee in enumerate(data["shares"])} for data in rows],
+        split_method=[data["split_method"] for data in rows],
+        description=[data.get("description", "") for data in rows],
+    )
+
+
+def read_bulk_rows() -> Iterator[Any]:
+    """
+    Rows of a bulk upload: a JSON array, or an NDJSON stream read line by line.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        for line in request.stream:
+            if line.strip():
+                yield line
+    else:
+        rows = request.get_json()
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of payments.")
+        yield from rows
+
+
+def format_payment(payment: Payment, name_map: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "id": payment.id,
+        "description": payment.description,
+        "participant_contributions": {
+            name_map[pid]: float(amount) for pid, amount in payment.participant_contributions.items()
+        },
+        "input_participant_shares": {
+            name_map[pid]: float(amount) for pid, amount in payment.input_participant_shares.items()
+        },
+        "split_participant_shares": {
+            name_map[pid]: float(amount) for pid, amount in payment.split_participant_shares.items()
+        },
+        "split_method": payment.split_method,
+    }
+
+
+def settlement(session: Session):
+    """
+    Net balances and settlement transactions of the session, memoized per ledger version.
+    """
+    return session.memo("settlement", lambda: (session.manager.get_net_balances(), session.manager.settle()))
+
+
+def named_settlement(session: Session) -> Dict[str, Any]:
+    net_balances, transactions = settlement(session)
+    return with_names(session.name_map, net_balances, transactions)
+
+
+def with_names(name_map: Dict[str, str], net_balances: Dict[str, float], transactions: List[Dict[str, Any]]):
+    # Convert to name-based format for frontend
+    return {
+        "net_balances": {name_map[pid]: balance for pid, balance in net_balances.items()},
+        "transactions": [
+            {
+                "from": name_map[tx["from"]],
+                "to": name_map[tx["to"]],
+                "amount": tx["amount"],
+            }
+            for tx in transactions
+        ],
+    }
+
+
+def ledger_changes(store: SessionStore, session_id: str, session: Session, since: Optional[int]) -> Dict[str, Any]:
+    """
+    Payments upserted and deleted after version `since` (everything when None or when the
+    change log no longer reaches back), with the current balances and transactions.
+    """
+    # payments, log and settlement all of one version
+    with session.lock.read():
+        snapshot = session.snapshot()
+        version = snapshot.version
+        if since is not None and since > version:
+            raise ValueError(f"Unknown version {since}, the ledger is at {version}")
+
+        changes = store.changes_since(session_id, since, version) if since is not None else None
+        settled = named_settlement(session)
+
+    payments, positions = snapshot.payments, snapshot.positions
+    if changes is None:
+        # no usable log: send the whole ledger and let the client start over
+        upserted = list(payments)
+        deleted = []
+    else:
+        upserted = [
+            payments[positions[pid]] for pid, change in changes.items() if change == "upsert" and pid in positions
+        ]
+        deleted = [pid for pid, change in changes.items() if change == "delete"]
+
+    return {
+        "version": version,
+        "since": since,
+        "reset": changes is None,
+        "upserted": [format_payment(payment, session.name_map) for payment in upserted],
+        "deleted": deleted,
+        **settled,
+    }
+
+
+def versioned_json(session: Session, key: str, build: Callable[[], Any]) -> Response:
+    """
+    JSON response serialized once per ledger version and tagged with the version ETag.
+    Clients sending a matching If-None-Match get an empty 304.
+    """
+    # the read lock keeps the tag and the body on the same version
+    with session.lock.read():
+        etag = session.etag
+        if etag in request.if_none_match:
+            response = current_app.response_class(status=304)
+        else:
+            body = session.memo(f"{key}.json", lambda: current_app.json.dumps(build()))
+            response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    # always revalidate so the browser never serves a stale ledger from its cache
+    response.cache_control.no_cache = True
+    return response
+
+
+def payment_page(
+    snapshot: LedgerSnapshot, cursor: Optional[str], limit: Optional[int]
+) -> Tuple[Sequence[Payment], Optional[str]]:
+    """
+    Up to `limit` payments after `cursor`, and the cursor of the next page (None on the last page).
+    A cursor is "<position>.<last payment id>": it resumes after that payment, or at the position
+    if the payment was deleted or replaced in the meantime.
+    """
+    payments, positions = snapshot.payments, snapshot.positions
+    start = 0
+    if cursor:
+        position, _, last_id = cursor.partition(".")
+        start = positions[last_id] + 1 if last_id in positions else min(int(position), len(payments))
+    end = len(payments) if limit is None else min(start + limit, len(payments))
+    next_cursor = f"{end}.{payments[end - 1].id}" if end < len(payments) else None
+    return payments[start:end], next_cursor
+
+
+def json_array(items: Iterable[Any], dumps: Callable[[Any], str]) -> Iterator[str]:
+    """
+    Serialize `items` as a JSON array, a batch of rows at a time.
+    """
+    items = iter(items)
+    yield "["
+    separator = ""
+    while True:
+        batch = list(islice(items, STREAM_BATCH))
+        if not batch:
+            break
+        yield separator + ",".join(map(dumps, batch))
+        separator = ","
+    yield "]"
+
+
+def compact_payments(session: Session, payments: Sequence[Payment], dumps: Callable[[Any], str]) -> Iterator[str]:
+    """
+    Columnar payments: participants are listed once and every payment refers to them by position,
+    with one array per field instead of name-keyed dicts per payment.
+    """
+    index = {pid: i for i, pid in enumerate(session.name_map)}
+    yield '{"participants":' + dumps([{"id": p.id, "name": p.name} for p in session.participants])
+    columns = {
+        "id": lambda pay: pay.id,
+        "description": lambda pay: pay.description,
+        "split_method": lambda pay: pay.split_method,
+        "paid_by": lambda pay: [index[pid] for pid in pay.participant_contributions],
+        "paid": lambda pay: list(pay.participant_contributions.values()),
+        "shared_by": lambda pay: [index[pid] for pid in pay.input_participant_shares],
+        "input_shares": lambda pay: list(pay.input_participant_shares.values()),
+        "shares": lambda pay: [index[pid] for pid in pay.split_shares_minor],
+        "share_amounts": lambda pay: list(pay.split_participant_shares.values()),
+    }
+    yield ',"payments":{'
+    for i, (name, column) in enumerate(columns.items()):
+        yield ("," if i else "") + f'"{name}":'
+        yield from json_array(map(column, payments), dumps)
+    yield "}"
+
+
+def stream_payments(
+    session: Session,
+    payments: Sequence[Payment],
+    compact: bool,
+    paginated: bool,
+    next_cursor: Optional[str],
+    dumps: Callable[[Any], str],
+) -> Iterator[str]:
+    """
+    Body of /api/payments; needs no request context, so it can be consumed after the view returns.
+    """
+    if compact:
+        yield from compact_payments(session, payments, dumps)
+    elif paginated:
+        yield '{"payments":'
+        yield from json_array((format_payment(payment, session.name_map) for payment in payments), dumps)
+    else:
+        # the plain array format of unpaginated requests
+        yield from json_array((format_payment(payment, session.name_map) for payment in payments), dumps)
+        return
+    yield ',"next_cursor":' + dumps(next_cursor) + "}"
+
+
+def event_stream(
+    store: SessionStore, hub: EventHub, subscription, publish: Callable[[str], None], heartbeat: float
+) -> Iterator[str]:
+    """
+    Server-sent events of one subscriber: the events fanned out by `hub`, and a comment line
+    whenever the stream is idle for `heartbeat` seconds.
+    """
+    session_id = subscription.session_id
+    try:
+        # clients reconnect after a dropped stream and catch up through /api/changes
+        yield "retry: 3000\n\n"
+        while not subscription.dropped:
+            event = subscription.get(heartbeat)
+            if event is not None:
+                yield event
+                continue
+            if store.get(session_id) is None:
+                return
+            # picks up writes that reached a shared store through another worker
+            publish(session_id)
+            yield ": keep-alive\n\n"
+    finally:
+        hub.unsubscribe(subscription)
 
 
 def register_routes(app):
+    store = app.config["SESSION_STORE"]
+    hub = app.config["EVENT_HUB"]
+
+    def publish(session_id: str):
+        """
+        Push the latest changes of the session to its event-stream subscribers, built once for all of them.
+        """
+        session = store.get(session_id)
+        if session is None:
+            return
+
+        def build(since: Optional[int]) -> Tuple[int, str]:
+            payload = ledger_changes(store, session_id, session, since)
+            return payload["version"], f"id: {payload['version']}\nevent: ledger\ndata: {app.json.dumps(payload)}\n\n"
+
+        try:
+            hub.publish(session_id, session.version, build)
+        except Exception as e:
+            # the write itself succeeded; subscribers catch up on their next sync
+            logger.warning("Publishing changes of session %s failed: %s", session_id, e)
+
+    @app.before_request
+    def start_timer():
+        if metrics.enabled():
+            g.request_start = time.perf_counter()
+
+    @app.teardown_request
+    def record_latency(exc):
+        start = g.pop("request_start", None)
+        if start is not None and request.endpoint is not None:
+            metrics.observe(f"route.{request.endpoint}", time.perf_counter() - start)
+
     @app.route("/")
     def index():
         return render_template("index.html")
@@ -24,160 +323,269 @@ def register_routes(app):
 
         # Create participants
         participants = [Person(name) for name in names]
-        id_map = {p.name: p.id for p in participants}
-        name_map = {p.id: p.name for p in participants}
 
-        # Store in session
-        session_id = request.cookies.get("session_id", "default")
-        sessions[session_id] = {
-            "participants": participants,
-            "id_map": id_map,
-            "name_map": name_map,
-            "payments": [],
-        }
+        # Store in session, giving clients without one their own id
+        session_id = request.cookies.get(SESSION_COOKIE) or secrets.token_urlsafe(16)
+        store.create_session(session_id, participants)
+        publish(session_id)
 
-        return jsonify({"participants": [{"name": p.name, "id": p.id} for p in participants]})
+        response = jsonify(
+            {
+                "participants": [{"name": p.name, "id": p.id} for p in participants],
+                # whether to subscribe to /api/events or poll /api/changes
+                "events": current_app.config["EVENT_STREAMS"],
+            }
+        )
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="Lax")
+        return response
 
     @app.route("/api/add_payment", methods=["POST"])
     def add_payment():
         try:
-            session_id = request.cookies.get("session_id", "default")
-            if session_id not in sessions:
+            session_id = request.cookies.get(SESSION_COOKIE)
+            session = store.get(session_id)
+            if session is None:
                 return jsonify({"error": "No active session"}), 400
 
-            session = sessions[session_id]
             data = request.get_json()
 
-            id_map = session["id_map"]
-            name_map = session["name_map"]
+            name_map = session.name_map
+            payment = parse_payment(data, session.id_map)
 
-            contributions = {id_map[payer]: float(data["amounts"][i]) for i, payer in enumerate(data["payers"])}
+            # If editing existing payment, replace it in place of adding
+            if data.get("id") and session.manager.has_payment(data["id"]):
+                store.replace_payment(session_id, data["id"], payment)
+            else:
+                store.add_payment(session_id, payment)
+            publish(session_id)
 
-            shares = {id_map[sharee]: float(data["share_amounts"][i]) for i, sharee in enumerate(data["shares"])}
-
-            payment = Payment(
-                participant_contributions=contributions,
-                input_participant_shares=shares,
-                split_method=data["split_method"],
-                description=data["description"],
+            # Return the payment with names instead of IDs
+            return jsonify(
+                {
+                    "message": "Payment added successfully",
+                    "payment": format_payment(payment, name_map),
+                }
             )
+        except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
+            return jsonify({"error": str(e)}), 400
 
-            # If editing existing payment, remove it first
-            if "id" in data and data["id"]:
-                session["payments"] = [p for p in session["payments"] if p.id != data["id"]]
+    @app.route("/api/payments/bulk", methods=["POST"])
+    def add_payments_bulk():
+        try:
+            session_id = request.cookies.get(SESSION_COOKIE)
+            session = store.get(session_id)
+            if session is None:
+                return jsonify({"error": "No active session"}), 400
 
-            # Add new payment
-            session["payments"].append(payment)
-
-            # Return the payment with names instead of IDs
-            formatted_payment = {
-                "id": payment.id,
-                "description": payment.description,
-                "participant_contributions": {
-                    name_map[pid]: float(amount) for pid, amount in payment.participant_contributions.items()
-                },
-                "input_participant_shares": {
-                    name_map[pid]: float(amount) for pid, amount in payment.input_participant_shares.items()
-                },
-                "split_participant_shares": {
-                    name_map[pid]: float(amount) for pid, amount in payment.split_participant_shares.items()
-                },
-                "split_method": payment.split_method,
-            }
+            # validate and split every row, keeping per-row errors instead of aborting
+            payments = []
+            errors = []
+            for row, data in enumerate(read_bulk_rows()):
+                try:
+                    if isinstance(data, bytes):
+                        data = current_app.json.loads(data)
+                    payments.append(parse_payment(data, session.id_map))
+                except Exception as e:
+                    logger.debug("Bulk row %d rejected: %s", row, e)
+                    errors.append({"row": row, "error": f"{type(e).__name__}: {e}"})
+
+            # commit all valid rows at once
+            if payments:
+                store.add_payments(session_id, payments)
+                publish(session_id)
 
             return jsonify(
                 {
-                    "message": "Payment added successfully",
-                    "payment": formatted_payment,
+                    "added": len(payments),
+                    "ids": [payment.id for payment in payments],
+                    "errors": errors,
                 }
             )
         except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
             return jsonify({"error": str(e)}), 400
 
     @app.route("/api/settle", methods=["GET"])
     def settle():
-        session_id = request.cookies.get("session_id", "default")
-        if session_id not in sessions:
+        session_id = request.cookies.get(SESSION_COOKIE)
+        session = store.get(session_id)
+        if session is None:
             return jsonify({"error": "Session not initialized"}), 400
 
-        session = sessions[session_id]
-
         try:
-            # Create expense manager and get settlements
-            em = ExpenseManager(session["participants"], session["payments"])
-            net_balances = em.get_net_balances()
-            transactions = em.settle()
-
-            # Convert to name-based format for frontend
-            named_balances = {session["name_map"][pid]: round(balance, 2) for pid, balance in net_balances.items()}
+            return versioned_json(session, "settle", lambda: named_settlement(session))
+        except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
+            return jsonify({"error": str(e)}), 400
 
-            named_transactions = [
-                {
-                    "from": session["name_map"][tx["from"]],
-                    "to": session["name_map"][tx["to"]],
-                    "amount": round(tx["amount"], 2),
-                }
-                for tx in transactions
-            ]
+    @app.route("/api/settle/preview", methods=["POST"])
+    def preview_settlement():
+        try:
+            session_id = request.cookies.get(SESSION_COOKIE)
+            session = store.get(session_id)
+            if session is None:
+                return jsonify({"error": "No active session"}), 400
 
+            # one candidate payment, or {"payments": [...]} with alternatives scored independently
+            data = request.get_json()
+            rows = data["payments"] if isinstance(data, dict) and "payments" in data else [data]
+            if not isinstance(rows, list) or not rows:
+                return jsonify({"error": "Expected one or more candidate payments"}), 400
+            if len(rows) > MAX_PAGE_SIZE:
+                return jsonify({"error": f"At most {MAX_PAGE_SIZE} candidates per preview"}), 400
+            candidates = parse_payments(rows, session.id_map)
+
+            # scored against the cached balances of one version; the ledger is left untouched
+            with session.lock.read():
+                version = session.version
+                previews = session.manager.preview(candidates)
             return jsonify(
                 {
-                    "net_balances": named_balances,
-                    "transactions": named_transactions,
+                    "version": version,
+                    "previews": [
+                        with_names(session.name_map, preview["net_balances"], preview["transactions"])
+                        for preview in previews
+                    ],
                 }
             )
         except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
             return jsonify({"error": str(e)}), 400
 
     @app.route("/api/payments", methods=["GET"])
     def get_payments():
         try:
-            session_id = request.cookies.get("session_id", "default")
-            if session_id not in sessions:
+            session_id = request.cookies.get(SESSION_COOKIE)
+            session = store.get(session_id)
+            if session is None:
                 return jsonify({"error": "No active session"}), 400
 
-            session = sessions[session_id]
-            name_map = session["name_map"]
-            payments = session["payments"]
-
-            # Convert payments to a frontend-friendly format
-            formatted_payments = []
-            for payment in payments:
-                contributions = {
-                    name_map[pid]: float(amount) for pid, amount in payment.participant_contributions.items()
-                }
-                shares = {name_map[pid]: float(amount) for pid, amount in payment.input_participant_shares.items()}
-                split_shares = {
-                    name_map[pid]: float(amount) for pid, amount in payment.split_participant_shares.items()
-                }
-
-                formatted_payments.append(
-                    {
-                        "id": payment.id,
-                        "description": payment.description,
-                        "participant_contributions": contributions,
-                        "input_participant_shares": shares,
-                        "split_participant_shares": split_shares,
-                        "split_method": payment.split_method,
-                    }
+            cursor = request.args.get("cursor")
+            limit = request.args.get("limit", type=int)
+            compact = request.args.get("format") == "compact"
+            if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+                return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+            # every page and format of a ledger version has its own tag
+            snapshot = session.snapshot()
+            etag = f"{session.token}-{snapshot.version}"
+            if request.query_string:
+                etag = f"{etag}-{zlib.crc32(request.query_string):08x}"
+            if etag in request.if_none_match:
+                response = current_app.response_class(status=304)
+            else:
+                # streamed from the immutable snapshot, so writes can proceed meanwhile
+                payments, next_cursor = payment_page(snapshot, cursor, limit)
+                paginated = limit is not None or cursor is not None
+                # written incrementally instead of formatting the whole ledger up front
+                response = current_app.response_class(
+                    stream_payments(session, payments, compact, paginated, next_cursor, current_app.json.dumps),
+                    mimetype="application/json",
                 )
+            response.set_etag(etag)
+            response.cache_control.no_cache = True
+            return response
+        except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
+            return jsonify({"error": str(e)}), 400
 
-            return jsonify(formatted_payments)
+    @app.route("/api/changes", methods=["GET"])
+    def get_changes():
+        try:
+            session_id = request.cookies.get(SESSION_COOKIE)
+            session = store.get(session_id)
+            if session is None:
+                return jsonify({"error": "No active session"}), 400
+
+            since = request.args.get("since", type=int)
+            return jsonify(ledger_changes(store, session_id, session, since))
         except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
             return jsonify({"error": str(e)}), 400
 
+    @app.route("/api/events", methods=["GET"])
+    def get_events():
+        if not current_app.config["EVENT_STREAMS"]:
+            return jsonify({"error": "Event streams are disabled on this server"}), 404
+        session_id = request.cookies.get(SESSION_COOKIE)
+        session = store.get(session_id)
+        if session is None:
+            return jsonify({"error": "No active session"}), 400
+
+        # subscribed before responding, so no update between this request and the first read is lost
+        subscription = hub.subscribe(session_id, session.version)
+        response = current_app.response_class(
+            event_stream(store, hub, subscription, publish, EVENT_HEARTBEAT), mimetype="text/event-stream"
+        )
+        response.cache_control.no_cache = True
+        # let reverse proxies pass events through as they are written
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
     @app.route("/api/payments/<payment_id>", methods=["DELETE"])
     def delete_payment(payment_id):
         try:
-            session_id = request.cookies.get("session_id", "default")
-            if session_id not in sessions:
+            session_id = request.cookies.get(SESSION_COOKIE)
+            session = store.get(session_id)
+            if session is None:
                 return jsonify({"error": "No active session"}), 400
 
-            session = sessions[session_id]
-
             # Remove the payment with the given ID
-            session["payments"] = [p for p in session["payments"] if p.id != payment_id]
+            if session.manager.has_payment(payment_id):
+                store.remove_payment(session_id, payment_id)
+                publish(session_id)
 
             return jsonify({"success": True})
         except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
+            return jsonify({"error": str(e)}), 400
+
+    @app.route("/api/checkpoint", methods=["POST"])
+    def checkpoint():
+        try:
+            session_id = request.cookies.get(SESSION_COOKIE)
+            session = store.get(session_id)
+            if session is None:
+                return jsonify({"error": "No active session"}), 400
+
+            # fold payments up to "upto" (default: all) into the checkpoint and archive them
+            data = request.get_json(silent=True) or {}
+            archived = store.checkpoint(session_id, data.get("upto"))
+            publish(session_id)
+            return jsonify({"archived": len(archived)})
+        except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
             return jsonify({"error": str(e)}), 400
+
+    @app.route("/api/payments/archived", methods=["GET"])
+    def get_archived_payments():
+        try:
+            session_id = request.cookies.get(SESSION_COOKIE)
+            session = store.get(session_id)
+            if session is None:
+                return jsonify({"error": "No active session"}), 400
+
+            # archived payments only change with a checkpoint, which bumps the version
+            return versioned_json(
+                session,
+                "archived",
+                lambda: [format_payment(payment, session.name_map) for payment in store.archived_payments(session_id)],
+            )
+        except Exception as e:
+            logger.warning("%s %s rejected: %s", request.method, request.path, e)
+            return jsonify({"error": str(e)}), 400
+
+    @app.route("/api/metrics", methods=["GET"])
+    def get_metrics():
+        sessions, payments = store.totals()
+        body = metrics.REGISTRY.render(
+            {
+                "fairfare_sessions": ("Number of sessions in the session store.", sessions),
+                "fairfare_payments": ("Number of payments across all sessions.", payments),
+                "fairfare_event_subscribers": ("Open event streams of this worker.", hub.subscriber_count()),
+                **store.gauges(),
+            },
+            store.counters(),
+        )
+        return current_app.response_class(body, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -5,6 +5,16 @@ let currentSession = null;
 // Add state for current expense being edited
 let currentExpenseId = null;
 
+// Local copy of the ledger, patched from /api/changes and the /api/events stream
+let ledgerVersion = null;
+let paymentsById = new Map();
+let latestSettlement = null;
+let ledgerEvents = null;
+let ledgerPoll = null;
+
+// how often to poll /api/changes when the server does not stream events
+const LEDGER_POLL_INTERVAL = 5000;
+
 // UI Functions
 function showStep(stepNumber) {
     document.getElementById('step1').classList.add('hidden');
@@ -61,10 +71,16 @@ async function initializeSession() {
 
         const data = await response.json();
         currentSession = data;
+        ledgerVersion = null;
         showStep(2);
         updatePayerList();
         updateSplitUI();
-        updateExpenseRecords();
+        await syncChanges();
+        if (data.events) {
+            subscribeToLedger();
+        } else {
+            pollLedger();
+        }
     } catch (error) {
         alert(error.message);
     }
@@ -355,7 +371,7 @@ function saveExpense() {
             throw new Error(data.error);
         }
         resetExpenseForm();
-        updateExpenseRecords();
+        return refreshLedger();
     })
     .catch(error => {
         alert(error.message);
@@ -387,38 +403,38 @@ function resetExpenseForm() {
     updateSplitUI();
 }
 
-async function settle() {
-    try {
-        const response = await fetch('/api/settle');
-        if (!response.ok) {
-            throw new Error('Failed to get settlement');
-        }
-
-        const data = await response.json();
+function renderSettlement(data) {
+    // Update net balances
+    const netBalances = document.getElementById('netBalances');
+    netBalances.innerHTML = Object.entries(data.net_balances)
+        .map(([name, balance]) => `
+            <div class="flex justify-between items-center p-2 ${balance >= 0 ? 'bg-green-100' : 'bg-red-100'} rounded">
+                <span>${name}</span>
+                <span class="font-semibold">${balance.toFixed(2)}</span>
+            </div>
+        `).join('');
 
-        // Update net balances
-        const netBalances = document.getElementById('netBalances');
-        netBalances.innerHTML = Object.entries(data.net_balances)
-            .map(([name, balance]) => `
-                <div class="flex justify-between items-center p-2 ${balance >= 0 ? 'bg-green-100' : 'bg-red-100'} rounded">
-                    <span>${name}</span>
-                    <span class="font-semibold">${balance.toFixed(2)}</span>
+    // Update transactions
+    const transactions = document.getElementById('transactions');
+    if (data.transactions.length === 0) {
+        transactions.innerHTML = '<p class="text-gray-600">No settlements needed!</p>';
+    } else {
+        transactions.innerHTML = data.transactions
+            .map(tx => `
+                <div class="flex justify-between items-center p-2 bg-indigo-100 rounded">
+                    <span>${tx.from} pays ${tx.to}</span>
+                    <span class="font-semibold">${tx.amount.toFixed(2)}</span>
                 </div>
             `).join('');
+    }
+}
 
-        // Update transactions
-        const transactions = document.getElementById('transactions');
-        if (data.transactions.length === 0) {
-            transactions.innerHTML = '<p class="text-gray-600">No settlements needed!</p>';
-        } else {
-            transactions.innerHTML = data.transactions
-                .map(tx => `
-                    <div class="flex justify-between items-center p-2 bg-indigo-100 rounded">
-                        <span>${tx.from} pays ${tx.to}</span>
-                        <span class="font-semibold">${tx.amount.toFixed(2)}</span>
-                    </div>
-                `).join('');
-        }
+async function settle() {
+    try {
+        // the change feed carries the settlement of the latest version; fetch it even with the
+        // stream open, since the event for our last write may not have arrived yet
+        await syncChanges();
+        renderSettlement(latestSettlement);
 
         // Remove any existing payment records section
         const existingRecords = document.getElementById('paymentRecordsSection');
@@ -440,7 +456,7 @@ async function settle() {
             </div>
             <div id="paymentRecords" class="hidden space-y-2"></div>
         `;
-        transactions.parentElement.appendChild(paymentRecords);
+        document.getElementById('transactions').parentElement.appendChild(paymentRecords);
 
         showStep(3);
     } catch (error) {
@@ -457,11 +473,10 @@ function togglePaymentRecords() {
         recordsDiv.classList.remove('hidden');
         button.textContent = 'Hide Records';
 
-        // Fetch and display payment records
-        fetch('/api/payments')
-            .then(response => response.json())
-            .then(payments => {
-                recordsDiv.innerHTML = payments.map(payment => `
+        // Display payment records from the synced ledger
+        refreshLedger()
+            .then(() => {
+                recordsDiv.innerHTML = Array.from(paymentsById.values()).map(payment => `
                     <div class="bg-white p-4 rounded shadow">
                         <div class="font-semibold mb-2">${payment.description}</div>
                         <div class="text-sm text-gray-600 space-y-1">
@@ -495,6 +510,17 @@ function resetSession() {
     // Clear participants
     participants = [];
     currentSession = null;
+    ledgerVersion = null;
+    paymentsById = new Map();
+    latestSettlement = null;
+    if (ledgerEvents) {
+        ledgerEvents.close();
+        ledgerEvents = null;
+    }
+    if (ledgerPoll) {
+        clearInterval(ledgerPoll);
+        ledgerPoll = null;
+    }
 
     // Reset form
     document.getElementById('participantList').innerHTML = '';
@@ -535,10 +561,7 @@ async function deleteExpense(paymentId) {
         }
 
         // Remove the record from the UI
-        const record = document.querySelector(`#expenseRecords [data-id="${paymentId}"]`);
-        if (record) {
-            record.remove();
-        }
+        await refreshLedger();
 
         // If we're currently editing this expense, reset the form
         if (currentExpenseId === paymentId) {
@@ -550,47 +573,95 @@ async function deleteExpense(paymentId) {
     }
 }
 
-function updateExpenseRecords() {
-    fetch('/api/payments')
-        .then(response => response.json())
-        .then(payments => {
-            const recordsDiv = document.getElementById('expenseRecords');
-            recordsDiv.innerHTML = ''; // Clear existing records
-
-            payments.forEach(payment => {
-                const recordDiv = document.createElement('div');
-                recordDiv.className = 'bg-gray-50 p-3 rounded hover:bg-gray-100 transition';
-                recordDiv.dataset.id = payment.id;
-                recordDiv.innerHTML = `
-                    <div class="flex justify-between items-start">
-                        <div class="flex-1 cursor-pointer" onclick="loadExpenseForEdit(${JSON.stringify(payment).replace(/"/g, '&quot;')})">
-                            <div class="font-medium">${payment.description}</div>
-                            <div class="text-sm text-gray-600">
-                                Paid by: ${Object.entries(payment.participant_contributions)
-                                    .map(([name, amount]) => `${name} (${amount.toFixed(2)})`)
-                                    .join(', ')}
-                            </div>
-                            <div class="text-sm text-gray-600">
-                                Split: ${payment.split_method.replace('_', ' ')}
-                            </div>
-                            <div class="text-sm text-gray-600">Input shares: ${Object.entries(payment.input_participant_shares)
-                                .map(([name, amount]) => `${name} (${amount.toFixed(2)})`)
-                                .join(', ')}</div>
-                            <div class="text-sm text-gray-600">Final shares: ${Object.entries(payment.split_participant_shares)
-                                .map(([name, amount]) => `${name} (${amount.toFixed(2)})`)
-                                .join(', ')}</div>
-                        </div>
-                        <button onclick="deleteExpense('${payment.id}')"
-                                class="text-red-600 hover:text-red-800 ml-2 px-2 py-1 rounded hover:bg-red-100">
-                            ×
-                        </button>
-                    </div>
-                `;
-                recordsDiv.appendChild(recordDiv);
-            });
-        })
-        .catch(error => {
-            console.error('Error fetching payments:', error);
-            alert('Failed to update expense records');
-        });
+async function syncChanges() {
+    // Fetch only what changed since the version we hold; the first call loads everything
+    const query = ledgerVersion === null ? '' : `?since=${ledgerVersion}`;
+    const response = await fetch(`/api/changes${query}`);
+    const data = await response.json();
+    if (!response.ok) {
+        throw new Error(data.error || 'Failed to sync expense records');
+    }
+    applyChanges(data);
+}
+
+function applyChanges(data) {
+    // a slow response must not roll back a newer version delivered in the meantime
+    if (!data.reset && ledgerVersion !== null && data.version <= ledgerVersion) {
+        return;
+    }
+    const recordsDiv = document.getElementById('expenseRecords');
+    if (data.reset) {
+        paymentsById = new Map();
+        recordsDiv.innerHTML = '';
+    }
+    data.deleted.forEach(paymentId => {
+        paymentsById.delete(paymentId);
+        const record = recordsDiv.querySelector(`[data-id="${paymentId}"]`);
+        if (record) {
+            record.remove();
+        }
+    });
+    data.upserted.forEach(payment => {
+        const record = recordsDiv.querySelector(`[data-id="${payment.id}"]`);
+        if (record) {
+            record.remove();
+        }
+        paymentsById.set(payment.id, payment);
+        addExpenseRecord(payment);
+    });
+
+    ledgerVersion = data.version;
+    latestSettlement = { net_balances: data.net_balances, transactions: data.transactions };
+}
+
+function refreshLedger() {
+    // an open event stream already delivers every change, including our own writes
+    if (ledgerEvents && ledgerEvents.readyState === EventSource.OPEN) {
+        return Promise.resolve();
+    }
+    return syncChanges();
+}
+
+function pollLedger() {
+    if (ledgerPoll) {
+        clearInterval(ledgerPoll);
+    }
+    ledgerPoll = setInterval(async () => {
+        try {
+            const version = ledgerVersion;
+            await syncChanges();
+            if (ledgerVersion !== version && !document.getElementById('step3').classList.contains('hidden')) {
+                renderSettlement(latestSettlement);
+            }
+        } catch (error) {
+            console.warn(error.message);
+        }
+    }, LEDGER_POLL_INTERVAL);
+}
+
+function subscribeToLedger() {
+    if (ledgerEvents) {
+        ledgerEvents.close();
+    }
+    ledgerEvents = new EventSource('/api/events');
+    // (re)connected: catch up on anything missed while the stream was down
+    ledgerEvents.addEventListener('open', () => {
+        syncChanges().catch(error => console.warn(error.message));
+    });
+    ledgerEvents.addEventListener('ledger', event => {
+        const data = JSON.parse(event.data);
+        if (!data.reset && ledgerVersion !== null && data.version <= ledgerVersion) {
+            return;
+        }
+        // deltas set the final state of each payment, so any base up to our version applies
+        if (data.reset || (ledgerVersion !== null && data.since !== null && data.since <= ledgerVersion)) {
+            applyChanges(data);
+        } else {
+            syncChanges().catch(error => console.warn(error.message));
+            return;
+        }
+        if (!document.getElementById('step3').classList.contains('hidden')) {
+            renderSettlement(latestSettlement);
+        }
+    });
 }
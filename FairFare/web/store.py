@@ -0,0 +1,699 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from FairFare.core import Payment, Person
+from FairFare.settler import ExpenseManager
+from FairFare.utils.money import MINOR_UNITS
+from FairFare.web.rwlock import RWLock
+from FairFare.web.singleflight import SingleFlight
+
+
+@dataclass(frozen=True)
+class LedgerSnapshot:
+    """
+    Payments of one ledger version. Published once per version and never mutated,
+    so it can be read (e.g. streamed) without holding the session lock.
+    """
+
+    version: int
+    payments: Tuple[Payment, ...]
+    positions: Mapping[str, int]
+
+
+@dataclass
+class Session:
+    participants: List[Person]
+    manager: ExpenseManager
+    version: int = 0
+    # distinguishes ledgers that reuse a session id, e.g. after a server restart
+    token: str = field(default_factory=lambda: uuid.uuid4().hex)
+    id_map: Dict[str, str] = field(init=False)
+    name_map: Dict[str, str] = field(init=False)
+    memos: Dict[str, Tuple[int, Any]] = field(init=False, default_factory=dict)
+    flights: SingleFlight = field(init=False, default_factory=SingleFlight)
+    # writers mutate the manager and bump the version under the write lock; readers of
+    # the manager and version hold the read lock and run concurrently
+    lock: RWLock = field(init=False, default_factory=RWLock)
+
+    def __post_init__(self):
+        self.id_map = {p.name: p.id for p in self.participants}
+        self.name_map = {p.id: p.name for p in self.participants}
+
+    @property
+    def etag(self) -> str:
+        return f"{self.token}-{self.version}"
+
+    def memo(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the value of `compute()` memoized for the current ledger version.
+        Concurrent misses for the same key and version share a single computation,
+        which runs under the read lock so no write lands in the middle of it.
+        """
+        with self.lock.read():
+            version = self.version
+            memo = self.memos.get(key)
+            if memo is not None and memo[0] == version:
+                return memo[1]
+            value = self.flights.do((key, version), compute)
+            self.memos[key] = (version, value)
+            return value
+
+    def snapshot(self) -> LedgerSnapshot:
+        """
+        Immutable snapshot of the current ledger version, built by the first reader of the version.
+        """
+
+        def build():
+            payments = tuple(self.manager.id_to_payment.values())
+            return LedgerSnapshot(
+                self.version, payments, MappingProxyType({payment.id: i for i, payment in enumerate(payments)})
+            )
+
+        return self.memo("snapshot", build)
+
+
+class SessionStore:
+    """
+    Storage of the per-session ledger used by the /api/* handlers.
+    Every mutation bumps the session version.
+    """
+
+    def create_session(self, session_id: str, participants: List[Person]) -> Session:
+        raise NotImplementedError
+
+    def get(self, session_id: str) -> Optional[Session]:
+        raise NotImplementedError
+
+    def _write(
+        self,
+        session_id: str,
+        apply: Callable[[ExpenseManager], None],
+        rows: Callable,
+        changes: Callable[[], List[Tuple[str, str]]],
+    ) -> None:
+        """
+        Apply a mutation to the session's manager and persist it as one new version.
+        :param apply: Mutates the manager; raising aborts the write.
+        :param rows: Writes the mutation through a `_Rows` (persistent stores only).
+        :param changes: (payment id, "upsert" or "delete") pairs of the mutation, for the change log.
+        """
+        raise NotImplementedError
+
+    def changes_since(self, session_id: str, since: int, until: int) -> Optional[Dict[str, str]]:
+        """
+        Last change of every payment touched after version `since`, up to and including version `until`.
+        :return: Mapping from payment id to "upsert" or "delete", or None if the log no longer
+            reaches back to `since` and the client has to reload the whole ledger.
+        """
+        raise NotImplementedError
+
+    def totals(self) -> Tuple[int, int]:
+        """
+        :return: Number of sessions and number of payments across all sessions.
+        """
+        raise NotImplementedError
+
+    def gauges(self) -> Dict[str, Tuple[str, float]]:
+        """
+        Store-specific gauges, as a mapping from metric name to (help text, value).
+        """
+        return {}
+
+    def counters(self) -> Dict[str, Tuple[str, float]]:
+        """
+        Store-specific counters, as a mapping from metric name to (help text, value).
+        """
+        return {}
+
+    def add_payment(self, session_id: str, payment: Payment):
+        self._write(
+            session_id,
+            lambda em: em.add_payment(payment),
+            lambda db: db.insert_payment(session_id, payment),
+            lambda: [(payment.id, "upsert")],
+        )
+
+    def add_payments(self, session_id: str, payments: List[Payment]):
+        self._write(
+            session_id,
+            lambda em: em.add_payments(payments),
+            lambda db: [db.insert_payment(session_id, payment) for payment in payments],
+            lambda: [(payment.id, "upsert") for payment in payments],
+        )
+
+    def replace_payment(self, session_id: str, payment_id: str, payment: Payment):
+        self._write(
+            session_id,
+            lambda em: em.replace_payment(payment_id, payment),
+            lambda db: (db.delete_payment(session_id, payment_id), db.insert_payment(session_id, payment)),
+            lambda: [(payment_id, "delete"), (payment.id, "upsert")],
+        )
+
+    def remove_payment(self, session_id: str, payment_id: str):
+        self._write(
+            session_id,
+            lambda em: em.remove_payment(payment_id),
+            lambda db: db.delete_payment(session_id, payment_id),
+            lambda: [(payment_id, "delete")],
+        )
+
+    def checkpoint(self, session_id: str, upto: Optional[str] = None) -> List[Payment]:
+        """
+        Fold the session's payments up to and including `upto` into its checkpoint and archive them.
+        :return: The archived payments.
+        """
+        archived: List[Payment] = []
+        managers: List[ExpenseManager] = []
+
+        def apply(em: ExpenseManager):
+            archived.extend(em.checkpoint(upto))
+            managers.append(em)
+            self._archive(session_id, archived)
+
+        self._write(
+            session_id,
+            apply,
+            lambda db: db.archive_payments(session_id, archived, managers[0].checkpoint_balances),
+            # archived payments leave the live ledger
+            lambda: [(payment.id, "delete") for payment in archived],
+        )
+        return archived
+
+    def _archive(self, session_id: str, payments: List[Payment]):
+        """
+        Keep payments folded by a checkpoint, inside the write (persistent stores archive them in `rows`).
+        """
+
+    def archived_payments(self, session_id: str) -> List[Payment]:
+        raise NotImplementedError
+
+
+# entries of the in-memory change log kept per session
+CHANGE_LOG_SIZE = 10_000
+
+# limits of the "memory" store unless its URL sets them
+DEFAULT_SESSION_TTL = 24 * 60 * 60
+DEFAULT_MAX_SESSIONS = 10_000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# rough resident size of the parts of a session, for the memory budget
+PARTICIPANT_BYTES = 400
+PAYMENT_BYTES = 1_200
+CHANGE_BYTES = 100
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions kept in a process-local dict; each worker process sees its own ledgers.
+    Sessions are kept in least-recently-used order and evicted once idle for longer than `ttl`
+    seconds, or least recently used first while there are more than `max_sessions` of them or
+    their estimated size exceeds `max_bytes`. A limit of None disables it.
+    """
+
+    def __init__(
+        self, ttl: Optional[float] = None, max_sessions: Optional[int] = None, max_bytes: Optional[int] = None
+    ):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.last_used: Dict[str, float] = {}
+        self.archives: Dict[str, List[Payment]] = {}
+        # bounded (version, payment id, change) log per session, and the oldest version it is complete from
+        self.change_logs: Dict[str, deque] = {}
+        self.change_log_bases: Dict[str, int] = {}
+        self.evictions = {"ttl": 0, "max_sessions": 0, "max_bytes": 0}
+        # estimated size of every session as of its last write, and their running total
+        self.sizes: Dict[str, int] = {}
+        self.bytes = 0
+        self.lock = threading.RLock()
+
+    def session_bytes(self, session_id: str) -> int:
+        """
+        Estimated memory held by a session, from counts that are O(1) to read.
+        """
+        session = self.sessions[session_id]
+        payments = len(session.manager.id_to_payment) + len(self.archives[session_id])
+        return (
+            len(session.participants) * PARTICIPANT_BYTES
+            + payments * PAYMENT_BYTES
+            + len(self.change_logs[session_id]) * CHANGE_BYTES
+        )
+
+    def total_bytes(self) -> int:
+        return self.bytes
+
+    def _resize(self, session_id: str):
+        size = self.session_bytes(session_id)
+        self.bytes += size - self.sizes.get(session_id, 0)
+        self.sizes[session_id] = size
+
+    def _evict(self, session_id: str, reason: str):
+        self.bytes -= self.sizes.pop(session_id)
+        del self.sessions[session_id]
+        del self.last_used[session_id]
+        del self.archives[session_id]
+        del self.change_logs[session_id]
+        del self.change_log_bases[session_id]
+        self.evictions[reason] += 1
+
+    def _touch(self, session_id: str):
+        self.sessions.move_to_end(session_id)
+        self.last_used[session_id] = time.monotonic()
+
+    def _enforce_limits(self, keep: Optional[str] = None):
+        """
+        Evict expired sessions, then least recently used ones until the limits hold.
+        The session `keep` (the one being written) is never evicted.
+        """
+        if self.ttl is not None:
+            # sessions are in LRU order, so the expired ones are at the front
+            deadline = time.monotonic() - self.ttl
+            for session_id in list(self.sessions):
+                if self.last_used[session_id] > deadline:
+                    break
+                if session_id != keep:
+                    self._evict(session_id, "ttl")
+        if self.max_sessions is not None:
+            for session_id in list(self.sessions):
+                if len(self.sessions) <= self.max_sessions:
+                    break
+                if session_id != keep:
+                    self._evict(session_id, "max_sessions")
+        if self.max_bytes is not None:
+            for session_id in list(self.sessions):
+                if self.bytes <= self.max_bytes:
+                    break
+                if session_id != keep:
+                    self._evict(session_id, "max_bytes")
+
+    def create_session(self, session_id: str, participants: List[Person]) -> Session:
+        with self.lock:
+            previous = self.sessions.get(session_id)
+            version = previous.version + 1 if previous is not None else 0
+            session = Session(participants, ExpenseManager(participants, []), version)
+            self.sessions[session_id] = session
+            self.archives[session_id] = []
+            self.change_logs[session_id] = deque(maxlen=CHANGE_LOG_SIZE)
+            self.change_log_bases[session_id] = version
+            self._touch(session_id)
+            self._resize(session_id)
+            self._enforce_limits(keep=session_id)
+            return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if self.ttl is not None and self.last_used[session_id] <= time.monotonic() - self.ttl:
+                self._evict(session_id, "ttl")
+                return None
+            self._touch(session_id)
+            return session
+
+    def _write(
+        self,
+        session_id: str,
+        apply: Callable[[ExpenseManager], None],
+        rows: Callable,
+        changes: Callable[[], List[Tuple[str, str]]],
+    ) -> None:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                raise KeyError(f"Unknown session '{session_id}'.")
+            self._touch(session_id)
+        # exclusive only for the in-memory update; readers of the previous version finish first,
+        # and readers of the new one find its changes in the log
+        with session.lock.write():
+            apply(session.manager)
+            session.version += 1
+            with self.lock:
+                log = self.change_logs.get(session_id)
+                if log is None:
+                    # evicted while the write was applied
+                    return
+                log.extend((session.version, payment_id, change) for payment_id, change in changes())
+                if len(log) == log.maxlen:
+                    # older entries fell off; only versions from the oldest remaining one on are complete
+                    self.change_log_bases[session_id] = max(self.change_log_bases[session_id], log[0][0])
+        with self.lock:
+            if session_id not in self.sessions:
+                return
+            self._resize(session_id)
+            self._enforce_limits(keep=session_id)
+
+    def changes_since(self, session_id: str, since: int, until: int) -> Optional[Dict[str, str]]:
+        with self.lock:
+            if session_id not in self.change_logs or since < self.change_log_bases[session_id]:
+                return None
+            # copied under the lock; writers append to it concurrently
+            log = list(self.change_logs[session_id])
+        return {payment_id: change for version, payment_id, change in log if since < version <= until}
+
+    def _archive(self, session_id: str, payments: List[Payment]):
+        archive = self.archives.get(session_id)
+        # None when the session was evicted during the write
+        if archive is not None:
+            archive.extend(payments)
+
+    def archived_payments(self, session_id: str) -> List[Payment]:
+        return list(self.archives.get(session_id, []))
+
+    def totals(self) -> Tuple[int, int]:
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return len(sessions), sum(len(session.manager.id_to_payment) for session in sessions)
+
+    def gauges(self) -> Dict[str, Tuple[str, float]]:
+        with self.lock:
+            return {"fairfare_session_bytes": ("Estimated memory held by in-memory sessions.", self.total_bytes())}
+
+    def counters(self) -> Dict[str, Tuple[str, float]]:
+        with self.lock:
+            return {
+                f"fairfare_sessions_evicted_{reason}_total": (f"Sessions evicted by the {reason} limit.", count)
+                for reason, count in self.evictions.items()
+            }
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    token TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS participants (
+    session_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (session_id, position)
+);
+CREATE TABLE IF NOT EXISTS payments (
+    seq INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    description TEXT NOT NULL,
+    split_method TEXT NOT NULL,
+    minor_units INTEGER NOT NULL,
+    archived INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (session_id, id)
+);
+CREATE TABLE IF NOT EXISTS payment_entries (
+    session_id TEXT NOT NULL,
+    payment_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    participant_id TEXT NOT NULL,
+    amount REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payment_entries_by_payment ON payment_entries (session_id, payment_id);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    session_id TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    minor_units INTEGER NOT NULL,
+    balances BLOB NOT NULL,
+    PRIMARY KEY (session_id, currency, minor_units)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    session_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    payment_id TEXT NOT NULL,
+    change TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_by_version ON changes (session_id, version);
+"""
+# databases created before payments could be archived
+ADD_ARCHIVED_COLUMN = "ALTER TABLE payments ADD COLUMN archived INTEGER NOT NULL DEFAULT 0"
+# checkpoint vectors are stored as little-endian int64 blobs aligned with the participant positions
+CHECKPOINT_DTYPE = np.dtype("<i8")
+
+# Statements are module constants so sqlite3's per-connection statement cache reuses them
+SELECT_VERSION = "SELECT version, token FROM sessions WHERE id = ?"
+BUMP_VERSION = "UPDATE sessions SET version = version + 1 WHERE id = ?"
+UPSERT_SESSION = (
+    "INSERT INTO sessions (id, version, token) VALUES (?, 0, ?) "
+    "ON CONFLICT (id) DO UPDATE SET version = sessions.version + 1, token = excluded.token"
+)
+DELETE_PARTICIPANTS = "DELETE FROM participants WHERE session_id = ?"
+DELETE_SESSION_PAYMENTS = "DELETE FROM payments WHERE session_id = ?"
+DELETE_SESSION_ENTRIES = "DELETE FROM payment_entries WHERE session_id = ?"
+DELETE_SESSION_CHECKPOINTS = "DELETE FROM checkpoints WHERE session_id = ?"
+DELETE_SESSION_CHANGES = "DELETE FROM changes WHERE session_id = ?"
+INSERT_CHANGE = "INSERT INTO changes (session_id, version, payment_id, change) VALUES (?, ?, ?, ?)"
+# the "reset" row written with a new session marks the version its log is complete from
+SELECT_CHANGE_LOG_BASE = "SELECT MIN(version) FROM changes WHERE session_id = ? AND change = 'reset'"
+SELECT_CHANGES = (
+    "SELECT payment_id, change FROM changes WHERE session_id = ? AND version > ? AND version <= ? ORDER BY rowid"
+)
+INSERT_PARTICIPANT = "INSERT INTO participants (session_id, position, id, name) VALUES (?, ?, ?, ?)"
+SELECT_PARTICIPANTS = "SELECT id, name FROM participants WHERE session_id = ? ORDER BY position"
+INSERT_PAYMENT = "INSERT INTO payments (session_id, id, description, split_method, minor_units) VALUES (?, ?, ?, ?, ?)"
+INSERT_ENTRY = (
+    "INSERT INTO payment_entries (session_id, payment_id, role, participant_id, amount) VALUES (?, ?, ?, ?, ?)"
+)
+DELETE_PAYMENT = "DELETE FROM payments WHERE session_id = ? AND id = ?"
+DELETE_PAYMENT_ENTRIES = "DELETE FROM payment_entries WHERE session_id = ? AND payment_id = ?"
+SELECT_PAYMENTS = (
+    "SELECT id, description, split_method, minor_units FROM payments "
+    "WHERE session_id = ? AND archived = ? ORDER BY seq"
+)
+COUNT_SESSIONS = "SELECT COUNT(*) FROM sessions"
+COUNT_PAYMENTS = "SELECT COUNT(*) FROM payments WHERE archived = 0"
+SELECT_ENTRIES = (
+    "SELECT e.payment_id, e.role, e.participant_id, e.amount FROM payment_entries AS e "
+    "JOIN payments AS p ON p.session_id = e.session_id AND p.id = e.payment_id "
+    "WHERE e.session_id = ? AND p.archived = ? ORDER BY e.rowid"
+)
+ARCHIVE_PAYMENT = "UPDATE payments SET archived = 1 WHERE session_id = ? AND id = ?"
+UPSERT_CHECKPOINT = (
+    "INSERT INTO checkpoints (session_id, currency, minor_units, balances) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (session_id, currency, minor_units) DO UPDATE SET balances = excluded.balances"
+)
+SELECT_CHECKPOINTS = "SELECT currency, minor_units, balances FROM checkpoints WHERE session_id = ?"
+
+
+class _Rows:
+    """
+    Row-level writes against one connection, used inside a store transaction.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def insert_payment(self, session_id: str, payment: Payment):
+        self.conn.execute(
+            INSERT_PAYMENT,
+            (session_id, payment.id, payment.description, payment.split_method, payment.minor_units),
+        )
+        self.conn.executemany(
+            INSERT_ENTRY,
+            [
+                *(
+                    (session_id, payment.id, "paid", pid, paid)
+                    for pid, paid in payment.participant_contributions.items()
+                ),
+                *(
+                    (session_id, payment.id, "share", pid, share)
+                    for pid, share in payment.input_participant_shares.items()
+                ),
+            ],
+        )
+
+    def delete_payment(self, session_id: str, payment_id: str):
+        self.conn.execute(DELETE_PAYMENT, (session_id, payment_id))
+        self.conn.execute(DELETE_PAYMENT_ENTRIES, (session_id, payment_id))
+
+    def archive_payments(
+        self,
+        session_id: str,
+        payments: List[Payment],
+        checkpoint_balances: Dict[Optional[Tuple[str, int]], np.ndarray],
+    ):
+        self.conn.executemany(ARCHIVE_PAYMENT, [(session_id, payment.id) for payment in payments])
+        self.conn.executemany(
+            UPSERT_CHECKPOINT,
+            [
+                (session_id, *(key or ("", 0)), vector.astype(CHECKPOINT_DTYPE).tobytes())
+                for key, vector in checkpoint_balances.items()
+            ],
+        )
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions persisted in a SQLite database in WAL mode, shared by every worker process.
+    Each worker keeps one connection per thread and a cache of loaded sessions that is
+    reused while the stored session version is unchanged.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pid = None
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        if "archived" not in {row[1] for row in conn.execute("PRAGMA table_info(payments)")}:
+            conn.execute(ADD_ARCHIVED_COLUMN)
+
+    def _connection(self) -> sqlite3.Connection:
+        # connections and cached sessions must not be shared across a fork
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+            self._cache: Dict[str, Session] = {}
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create_session(self, session_id: str, participants: List[Person]) -> Session:
+        conn = self._connection()
+        token = uuid.uuid4().hex
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(UPSERT_SESSION, (session_id, token))
+            conn.execute(DELETE_PARTICIPANTS, (session_id,))
+            conn.execute(DELETE_SESSION_PAYMENTS, (session_id,))
+            conn.execute(DELETE_SESSION_ENTRIES, (session_id,))
+            conn.execute(DELETE_SESSION_CHECKPOINTS, (session_id,))
+            conn.execute(DELETE_SESSION_CHANGES, (session_id,))
+            conn.executemany(
+                INSERT_PARTICIPANT,
+                [(session_id, position, p.id, p.name) for position, p in enumerate(participants)],
+            )
+            (version, _) = conn.execute(SELECT_VERSION, (session_id,)).fetchone()
+            conn.execute(INSERT_CHANGE, (session_id, version, "", "reset"))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        session = Session(participants, ExpenseManager(participants, []), version, token)
+        self._cache[session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        conn = self._connection()
+        row = conn.execute(SELECT_VERSION, (session_id,)).fetchone()
+        if row is None:
+            self._cache.pop(session_id, None)
+            return None
+        return self._load(conn, session_id, *row)
+
+    def _load(self, conn: sqlite3.Connection, session_id: str, version: int, token: str) -> Session:
+        cached = self._cache.get(session_id)
+        if cached is not None and cached.version == version and cached.token == token:
+            return cached
+
+        participants = [Person(name, pid) for pid, name in conn.execute(SELECT_PARTICIPANTS, (session_id,))]
+        payments = self._read_payments(conn, session_id, archived=False)
+        checkpoint = {
+            (None if currency == "" else (currency, minor_units)): np.frombuffer(balances, dtype=CHECKPOINT_DTYPE)
+            for currency, minor_units, balances in conn.execute(SELECT_CHECKPOINTS, (session_id,))
+        }
+        manager = ExpenseManager(participants, payments, checkpoint=checkpoint)
+        session = Session(participants, manager, version, token)
+        self._cache[session_id] = session
+        return session
+
+    def _read_payments(self, conn: sqlite3.Connection, session_id: str, archived: bool) -> List[Payment]:
+        entries: Dict[str, Tuple[Dict[str, float], Dict[str, float]]] = {}
+        for payment_id, role, pid, amount in conn.execute(SELECT_ENTRIES, (session_id, archived)):
+            contributions, shares = entries.setdefault(payment_id, ({}, {}))
+            (contributions if role == "paid" else shares)[pid] = amount
+        rows = conn.execute(SELECT_PAYMENTS, (session_id, archived)).fetchall()
+        minor_units = {row[3] for row in rows} or {MINOR_UNITS}
+        if len(minor_units) > 1:
+            raise ValueError(f"Session '{session_id}' mixes payments with different minor units.")
+        return Payment.from_columns(
+            [entries.get(payment_id, ({}, {}))[0] for payment_id, *_ in rows],
+            [entries.get(payment_id, ({}, {}))[1] for payment_id, *_ in rows],
+            split_method=[split_method for _, _, split_method, _ in rows],
+            description=[description for _, description, _, _ in rows],
+            id=[payment_id for payment_id, *_ in rows],
+            minor_units=minor_units.pop(),
+        )
+
+    def archived_payments(self, session_id: str) -> List[Payment]:
+        return self._read_payments(self._connection(), session_id, archived=True)
+
+    def _write(
+        self,
+        session_id: str,
+        apply: Callable[[ExpenseManager], None],
+        rows: Callable,
+        changes: Callable[[], List[Tuple[str, str]]],
+    ) -> None:
+        conn = self._connection()
+        # the write lock keeps the version stable while the cached session is brought up to date
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(SELECT_VERSION, (session_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown session '{session_id}'.")
+            session = self._load(conn, session_id, *row)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # readers of this worker's cached session must not see the manager ahead of its version
+        with session.lock.write():
+            try:
+                apply(session.manager)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            try:
+                rows(_Rows(conn))
+                conn.execute(BUMP_VERSION, (session_id,))
+                conn.executemany(
+                    INSERT_CHANGE,
+                    [(session_id, row[0] + 1, payment_id, change) for payment_id, change in changes()],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._cache.pop(session_id, None)
+                raise
+            session.version += 1
+
+    def changes_since(self, session_id: str, since: int, until: int) -> Optional[Dict[str, str]]:
+        conn = self._connection()
+        (base,) = conn.execute(SELECT_CHANGE_LOG_BASE, (session_id,)).fetchone()
+        if base is None or since < base:
+            return None
+        return dict(conn.execute(SELECT_CHANGES, (session_id, since, until)))
+
+    def totals(self) -> Tuple[int, int]:
+        conn = self._connection()
+        return conn.execute(COUNT_SESSIONS).fetchone()[0], conn.execute(COUNT_PAYMENTS).fetchone()[0]
+
+
+def create_store(url: str) -> SessionStore:
+    """
+    Build a session store from `url`: "memory" or "sqlite:///path/to/fairfare.db".
+    The memory store takes its limits as query parameters, e.g. "memory?ttl=3600&max_sessions=1000&max_bytes=268435456";
+    limits left out keep their defaults and "none" disables one.
+    """
+    if url == "memory" or url.startswith("memory?"):
+        options = {"ttl": DEFAULT_SESSION_TTL, "max_sessions": DEFAULT_MAX_SESSIONS, "max_bytes": DEFAULT_MAX_BYTES}
+        for key, value in parse_qsl(urlsplit(url).query):
+            if key not in options:
+                raise ValueError(f"Unknown memory store option '{key}'. Use 'ttl', 'max_sessions' or 'max_bytes'.")
+            options[key] = None if value == "none" else float(value) if key == "ttl" else int(value)
+        return MemorySessionStore(**options)
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///") :])
+    raise ValueError(f"Unknown session store '{url}'. Use 'memory' or 'sqlite:///<path>'.")
@@ -0,0 +1,136 @@
+"""
+Generate a synthetic ledger in the FairFare/data/test_case_* layout (names.txt + payments.json).
+
+Usage:
+    python -m benchmarks.generate out_dir --participants 1000 --payments 100000 \
+        --max-payers 3 --max-sharees 8 --split-mix even=0.6 exact=0.2 ratio=0.2
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_SPLIT_MIX = {"even": 0.6, "exact": 0.2, "ratio": 0.2}
+
+
+def _partition(total_cents: int, parts: int, rng: random.Random) -> List[int]:
+    """
+    Random split of `total_cents` into `parts` non-negative integers.
+    """
+    cuts = sorted(rng.randint(0, total_cents) for _ in range(parts - 1))
+    return [b - a for a, b in zip([0] + cuts, cuts + [total_cents])]
+
+
+def generate_participants(participants: int) -> List[Tuple[str, str]]:
+    return [(f"P{i}", f"p{i:07d}") for i in range(participants)]
+
+
+def generate_payments(
+    participant_ids: List[str],
+    payments: int,
+    max_payers: int = 3,
+    max_sharees: int = 8,
+    split_mix: Optional[Dict[str, float]] = None,
+    seed: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield payment rows in the `payments.json` format.
+    :param participant_ids: Ids to draw payers and sharees from.
+    :param payments: Number of payments.
+    :param max_payers: Each payment has 1..max_payers payers.
+    :param max_sharees: Each payment is split among 1..max_sharees participants.
+    :param split_mix: Relative frequency of the "even", "exact" and "ratio" split methods.
+    """
+    rng = random.Random(seed)
+    split_mix = split_mix or DEFAULT_SPLIT_MIX
+    methods, weights = zip(*split_mix.items())
+    max_payers = min(max_payers, len(participant_ids))
+    max_sharees = min(max_sharees, len(participant_ids))
+
+    for i in range(payments):
+        payers = rng.sample(participant_ids, rng.randint(1, max_payers))
+        sharees = rng.sample(participant_ids, rng.randint(1, max_sharees))
+        paid_cents = [rng.randint(1, 50_000) for _ in payers]
+        method = rng.choices(methods, weights)[0]
+
+        if method == "exact":
+            share_cents = _partition(sum(paid_cents), len(sharees), rng)
+            shares = {pid: cents / 100 for pid, cents in zip(sharees, share_cents)}
+        elif method == "ratio":
+            # ratios in whole percent, so they sum to exactly 1
+            percents = _partition(100, len(sharees), rng)
+            shares = {pid: percent / 100 for pid, percent in zip(sharees, percents)}
+        else:
+            shares = {pid: 0 for pid in sharees}
+
+        yield {
+            "participant_contributions": {pid: cents / 100 for pid, cents in zip(payers, paid_cents)},
+            "input_participant_shares": shares,
+            "split_method": method,
+            "description": f"payment {i}",
+        }
+
+
+def write_ledger(
+    out_dir: str,
+    participants: int,
+    payments: int,
+    max_payers: int = 3,
+    max_sharees: int = 8,
+    split_mix: Optional[Dict[str, float]] = None,
+    seed: int = 0,
+) -> Path:
+    """
+    Write names.txt and payments.json for a synthetic ledger into `out_dir`.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    people = generate_participants(participants)
+    with open(out / "names.txt", "w") as f:
+        f.writelines(f"{name}, {pid}\n" for name, pid in people)
+
+    rows = generate_payments([pid for _, pid in people], payments, max_payers, max_sharees, split_mix, seed)
+    with open(out / "payments.json", "w") as f:
+        # written row by row so large ledgers are never held in memory
+        f.write("[\n")
+        for i, row in enumerate(rows):
+            f.write(("" if i == 0 else ",\n") + json.dumps(row))
+        f.write("\n]\n")
+    return out
+
+
+def parse_split_mix(values: List[str]) -> Dict[str, float]:
+    mix = {}
+    for value in values:
+        method, weight = value.split("=")
+        mix[method] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("--participants", type=int, default=100)
+    parser.add_argument("--payments", type=int, default=1_000)
+    parser.add_argument("--max-payers", type=int, default=3)
+    parser.add_argument("--max-sharees", type=int, default=8)
+    parser.add_argument("--split-mix", nargs="+", default=[f"{k}={v}" for k, v in DEFAULT_SPLIT_MIX.items()])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    out = write_ledger(
+        args.out_dir,
+        args.participants,
+        args.payments,
+        args.max_payers,
+        args.max_sharees,
+        parse_split_mix(args.split_mix),
+        args.seed,
+    )
+    print(f"Wrote {out / 'names.txt'} and {out / 'payments.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare runtime and transaction count of the settlement methods on random balances.
+
+Usage:
+    python -m benchmarks.settlement --sizes 100 1000 10000 --methods greedy heap_greedy
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from FairFare.utils.mappings import SETTLEMENT_METHODS_MAPPING
+
+
+def random_balances(n: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Generate `n` random net balances (in whole cents) that sum to zero.
+    """
+    rng = random.Random(seed)
+    cents = [rng.randint(-100_000, 100_000) for _ in range(n - 1)]
+    cents.append(-sum(cents))
+    return {f"p{i}": c / 100 for i, c in enumerate(cents)}
+
+
+def run(sizes: List[int], methods: List[str], repeat: int, seed: int) -> List[Dict]:
+    results = []
+    for n in sizes:
+        balances = random_balances(n, seed)
+        for method in methods:
+            settle = SETTLEMENT_METHODS_MAPPING[method]
+            best = float("inf")
+            try:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    transactions = settle(balances)
+                    best = min(best, time.perf_counter() - start)
+            except ValueError as e:
+                # e.g. float drift tripping the zero-sum check on large groups
+                results.append({"participants": n, "method": method, "error": str(e)})
+                continue
+            results.append(
+                {
+                    "participants": n,
+                    "method": method,
+                    "seconds": best,
+                    "transactions": len(transactions),
+                }
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--methods", nargs="+", default=["greedy", "heap_greedy"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'participants':>12} {'method':>12} {'seconds':>10} {'transactions':>12}")
+    for row in run(args.sizes, args.methods, args.repeat, args.seed):
+        if "error" in row:
+            print(f"{row['participants']:>12} {row['method']:>12} {'error':>10} {row['error']}")
+            continue
+        print(f"{row['participants']:>12} {row['method']:>12} {row['seconds']:>10.4f} {row['transactions']:>12}")
+
+
+if __name__ == "__main__":
+    main()
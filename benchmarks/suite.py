@@ -0,0 +1,218 @@
+"""
+Time the engine end to end on synthetic ledgers and flag regressions against a baseline.
+
+Stages timed per ledger size: Payment construction (one by one and via Payment.from_columns),
+balance_expenses (row-wise and columnar, loading and rebalancing), every settlement method, and the Flask routes
+through the test client.
+
+Usage:
+    python -m benchmarks.suite --sizes 100 1000 10000 --output results.json
+    python -m benchmarks.suite --sizes 100 1000 10000 --baseline results.json --threshold 0.25
+
+Exits with status 1 when a stage is slower than its baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.generate import DEFAULT_SPLIT_MIX, generate_participants, generate_payments, parse_split_mix
+from FairFare.core import Payment, Person
+from FairFare.frames import frame_balances
+from FairFare.settler import ExpenseManager
+from FairFare.utils.mappings import GROUP_SETTLEMENT_METHODS, SETTLEMENT_METHODS_MAPPING
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def route_rows(rows: List[Dict[str, Any]], name_map: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Convert payments.json rows into the name-based format of the web API.
+    """
+    return [
+        {
+            "payers": [name_map[pid] for pid in row["participant_contributions"]],
+            "amounts": list(row["participant_contributions"].values()),
+            "shares": [name_map[pid] for pid in row["input_participant_shares"]],
+            "share_amounts": list(row["input_participant_shares"].values()),
+            "split_method": row["split_method"],
+            "description": row["description"],
+        }
+        for row in rows
+    ]
+
+
+def bench_routes(people, rows, repeat: int) -> Dict[str, float]:
+    from FairFare.web import create_app
+    from FairFare.web.store import MemorySessionStore
+
+    app = create_app(MemorySessionStore())
+    client = app.test_client()
+    names = [name for name, _ in people]
+    payload = route_rows(rows, {pid: name for name, pid in people})
+
+    def upload():
+        client.post("/api/initialize", json={"names": names})
+        response = client.post("/api/payments/bulk", json=payload)
+        assert not response.get_json()["errors"]
+
+    timings = {"route.bulk": best_of(repeat, upload)}
+    # first request after the upload computes, later ones are served from the per-version memo
+    start = time.perf_counter()
+    client.get("/api/settle")
+    timings["route.settle"] = time.perf_counter() - start
+    timings["route.settle_cached"] = best_of(repeat, lambda: client.get("/api/settle"))
+    start = time.perf_counter()
+    # the payments are streamed, so read the whole body to time their serialization
+    client.get("/api/payments").get_data()
+    timings["route.payments"] = time.perf_counter() - start
+    return timings
+
+
+def bench_size(
+    payments: int,
+    participants: int,
+    methods: List[str],
+    repeat: int,
+    route_max_size: int,
+    generator_options: Dict[str, Any],
+) -> Dict[str, float]:
+    people = generate_participants(participants)
+    rows = list(generate_payments([pid for _, pid in people], payments, **generator_options))
+    persons = [Person(name, pid) for name, pid in people]
+
+    timings = {
+        "payment.init": best_of(repeat, lambda: [Payment(**row) for row in rows]),
+        "payment.from_columns": best_of(
+            repeat,
+            lambda: Payment.from_columns(
+                [row["participant_contributions"] for row in rows],
+                [row["input_participant_shares"] for row in rows],
+                [row["split_method"] for row in rows],
+                [row["description"] for row in rows],
+            ),
+        ),
+    }
+
+    payment_list = [Payment(**row) for row in rows]
+    em = ExpenseManager(persons, [])
+    em_columnar = ExpenseManager(persons, [], columnar=True)
+    timings["balance_expenses"] = best_of(repeat, lambda: setattr(em, "payment_list", payment_list))
+    timings["balance_expenses.columnar"] = best_of(repeat, lambda: setattr(em_columnar, "payment_list", payment_list))
+    # recomputing loaded ledgers: a replay of every payment vs a scatter-add over the kept entries
+    timings["balance_expenses.rebalance"] = best_of(repeat, em.balance_expenses)
+    timings["balance_expenses.rebalance.columnar"] = best_of(repeat, em_columnar.balance_expenses)
+    frame = em.to_dataframe()
+    timings["frames.balance"] = best_of(repeat, lambda: frame_balances(frame, em.id_to_index))
+
+    balances = em.get_net_balances()
+    groups = em.co_participation_groups()
+    for method in methods:
+        settle = SETTLEMENT_METHODS_MAPPING[method]
+        options = {"groups": groups} if method in GROUP_SETTLEMENT_METHODS else {}
+        timings[f"settle.{method}"] = best_of(repeat, lambda: settle(balances, **options))
+
+    if payments <= route_max_size:
+        timings.update(bench_routes(people, rows, repeat))
+    return timings
+
+
+def run(
+    sizes: List[int],
+    participants: int,
+    methods: List[str],
+    repeat: int,
+    route_max_size: int,
+    generator_options: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    results = []
+    for n in sizes:
+        for stage, seconds in bench_size(n, participants, methods, repeat, route_max_size, generator_options).items():
+            results.append({"stage": stage, "payments": n, "participants": participants, "seconds": seconds})
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float, min_seconds: float
+) -> List[Dict[str, Any]]:
+    """
+    Stages slower than their baseline by more than `threshold` (relative).
+    Differences below `min_seconds` are treated as noise.
+    :return: One entry per regressed stage.
+    """
+    previous = {(row["stage"], row["payments"]): row["seconds"] for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row["stage"], row["payments"]))
+        if before is None:
+            continue
+        if row["seconds"] > before * (1 + threshold) and row["seconds"] - before > min_seconds:
+            regressions.append({**row, "baseline": before, "ratio": row["seconds"] / before})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--participants", type=int, default=1_000)
+    parser.add_argument("--max-payers", type=int, default=3)
+    parser.add_argument("--max-sharees", type=int, default=8)
+    parser.add_argument("--split-mix", nargs="+", default=[f"{k}={v}" for k, v in DEFAULT_SPLIT_MIX.items()])
+    parser.add_argument("--methods", nargs="+", default=list(SETTLEMENT_METHODS_MAPPING))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--route-max-size", type=int, default=100_000, help="Skip the Flask routes above this size.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown per stage.")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="Ignore slowdowns smaller than this.")
+    args = parser.parse_args(argv)
+
+    generator_options = {
+        "max_payers": args.max_payers,
+        "max_sharees": args.max_sharees,
+        "split_mix": parse_split_mix(args.split_mix),
+        "seed": args.seed,
+    }
+    results = run(args.sizes, args.participants, args.methods, args.repeat, args.route_max_size, generator_options)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "options": {**generator_options, "participants": args.participants, "repeat": args.repeat},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    print(f"{'payments':>10} {'stage':>28} {'seconds':>10}")
+    for row in results:
+        print(f"{row['payments']:>10} {row['stage']:>28} {row['seconds']:>10.4f}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold, args.min_seconds)
+        for row in regressions:
+            print(
+                f"REGRESSION {row['stage']} at {row['payments']} payments: "
+                f"{row['seconds']:.4f}s vs {row['baseline']:.4f}s ({row['ratio']:.2f}x)",
+                file=sys.stderr,
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())